@@ -1,5 +1,63 @@
+import sys
+from array import array
+from bisect import bisect_left, insort
+from itertools import compress, count
+from math import ceil, isfinite
+
+
+def search_key(value):
+    """Нормализованное значение для поиска без учета регистра.
+
+    Строки интернируются, поэтому одинаковые ключи у разных товаров
+    хранятся в памяти один раз.
+    """
+    return sys.intern(str(value).casefold())
+
+
+def summarize(values, percentiles=(50, 90)):
+    """Сводные показатели по непустому набору чисел.
+
+    Возвращает количество, сумму, среднее, минимум, максимум и процентили
+    (по ближайшему рангу) в виде словаря с ключами count, sum, mean, min, max, p50...
+    """
+    values = list(values)
+    count = len(values)
+    total = sum(values)
+    stats = {'count': count, 'sum': total, 'mean': total / count,
+             'min': min(values), 'max': max(values)}
+
+    if percentiles:
+        # Сортировка нужна только для процентилей
+        values.sort()
+        for percentile in percentiles:
+            stats[f'p{percentile}'] = values[max(ceil(percentile / 100 * count) - 1, 0)]
+    return stats
+
+
+def aggregate_fields(group_by, value):
+    """Проверить параметры aggregate и вернуть кортеж полей группировки"""
+    fields = (group_by,) if isinstance(group_by, str) else tuple(group_by)
+    if not fields:
+        raise ValueError('Не указаны поля группировки')
+    for field in fields:
+        if field not in Shoe.SEARCH_FIELDS and field not in Shoe.NUMERIC_FIELDS:
+            raise ValueError(f'Нельзя группировать по полю {field!r}')
+    if value not in Shoe.NUMERIC_FIELDS:
+        raise ValueError(f'Поле {value!r} не числовое')
+    return fields
+
+
 # Модель
 class Shoe:
+    __slots__ = ('shoe_id', 'shoe_type', 'shoe_kind', 'color', 'price', 'manufacturer', 'size',
+                 '_search_keys')
+
+    # Поля, которые можно менять через update_shoe
+    EDITABLE_FIELDS = ('shoe_type', 'shoe_kind', 'color', 'price', 'manufacturer', 'size')
+    # Поля, для которых хранятся нормализованные ключи поиска
+    SEARCH_FIELDS = ('shoe_type', 'shoe_kind', 'manufacturer', 'color')
+    NUMERIC_FIELDS = ('price', 'size')
+
     def __init__(self, shoe_id, shoe_type, shoe_kind, color, price, manufacturer, size):
         self.shoe_id = shoe_id
         self.shoe_type = shoe_type
@@ -8,6 +66,18 @@ class Shoe:
         self.price = price
         self.manufacturer = manufacturer
         self.size = size
+        self._search_keys = None
+
+    @property
+    def search_keys(self):
+        """Ключи поиска в порядке SEARCH_FIELDS, вычисляются один раз"""
+        if self._search_keys is None:
+            self._search_keys = tuple(search_key(getattr(self, field)) for field in self.SEARCH_FIELDS)
+        return self._search_keys
+
+    def invalidate_search_keys(self):
+        """Сбросить ключи поиска после изменения полей"""
+        self._search_keys = None
 
     def to_dict(self):
         """Преобразование в словарь"""
@@ -24,28 +94,141 @@ class Shoe:
     def __str__(self):
         return f'{self.shoe_type} {self.shoe_kind} ({self.color}),размер {self.size}, цена {self.price} руб.'
 
+class PriceIndex:
+    """Отсортированный индекс пар (цена, id), разбитый на небольшие блоки.
+
+    Вставка и удаление сдвигают элементы только внутри одного блока,
+    поэтому стоят O(log n + размер блока), а запрос диапазона - O(log n + k).
+    """
+
+    BLOCK_SIZE = 512
+
+    def __init__(self):
+        self._blocks = []  # отсортированные блоки пар (цена, id)
+        self._maxes = []  # последний элемент каждого блока
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, price, shoe_id):
+        """Добавить пару в индекс"""
+        item = (price, shoe_id)
+        self._size += 1
+        if not self._blocks:
+            self._blocks.append([item])
+            self._maxes.append(item)
+            return
+
+        position = bisect_left(self._maxes, item)
+        if position == len(self._blocks):
+            position -= 1
+        block = self._blocks[position]
+        insort(block, item)
+        self._maxes[position] = block[-1]
+
+        if len(block) > 2 * self.BLOCK_SIZE:
+            self._blocks[position:position + 1] = [block[:self.BLOCK_SIZE], block[self.BLOCK_SIZE:]]
+            self._maxes[position:position + 1] = [block[self.BLOCK_SIZE - 1], block[-1]]
+
+    def remove(self, price, shoe_id):
+        """Удалить пару из индекса"""
+        item = (price, shoe_id)
+        position = bisect_left(self._maxes, item)
+        if position < len(self._blocks):
+            block = self._blocks[position]
+            i = bisect_left(block, item)
+        if position == len(self._blocks) or i == len(block) or block[i] != item:
+            raise ValueError(f'Пары {item} нет в индексе цен')
+        del block[i]
+        self._size -= 1
+
+        if block:
+            self._maxes[position] = block[-1]
+        else:
+            del self._blocks[position]
+            del self._maxes[position]
+
+    def _rank(self, item):
+        """Количество пар, меньших item"""
+        position = bisect_left(self._maxes, item)
+        if position == len(self._blocks):
+            return self._size
+        preceding = sum(len(block) for block in self._blocks[:position])
+        return preceding + bisect_left(self._blocks[position], item)
+
+    def count(self, min_price=None, max_price=None):
+        """Количество пар в диапазоне цен без их перебора"""
+        low = self._rank((min_price,)) if min_price is not None else 0
+        high = self._rank((max_price, float('inf'))) if max_price is not None else self._size
+        return max(high - low, 0)
+
+    def irange(self, min_price=None, max_price=None):
+        """Пары (цена, id) в диапазоне цен в порядке возрастания цены"""
+        start = (min_price,) if min_price is not None else None
+        position = bisect_left(self._maxes, start) if start else 0
+
+        for block in self._blocks[position:]:
+            low = bisect_left(block, start) if start else 0
+            for item in block[low:]:
+                if max_price is not None and item[0] > max_price:
+                    return
+                yield item
+            start = None
+
+
 class ShoeModel:
+    # Поля, по которым строятся вторичные индексы (по ключам поиска обуви)
+    INDEXED_FIELDS = Shoe.SEARCH_FIELDS
+
     def __init__(self):
-        self.shoes = []
-        self.next_id = 1
+        self.shoes = {}  # id -> обувь, порядок добавления сохраняется
+        self.indexes = {field: {} for field in self.INDEXED_FIELDS}  # поле -> значение -> множество id
+        self.price_index = PriceIndex()
+        self.last_search_stats = None  # статистика последнего поиска для настройки индексов
+        self._ids = count(1)  # next() у itertools.count атомарен: id не повторяются между потоками
+
+    def _index_shoe(self, shoe):
+        """Добавить обувь во вторичные индексы"""
+        for index, key in zip(self.indexes.values(), shoe.search_keys):
+            index.setdefault(key, set()).add(shoe.shoe_id)
+        self.price_index.add(shoe.price, shoe.shoe_id)
+
+    def _unindex_shoe(self, shoe):
+        """Убрать обувь из вторичных индексов"""
+        for index, key in zip(self.indexes.values(), shoe.search_keys):
+            ids = index[key]
+            ids.discard(shoe.shoe_id)
+            if not ids:
+                del index[key]
+        self.price_index.remove(shoe.price, shoe.shoe_id)
+
+    def _get_ids(self, field, value):
+        """Множество id обуви с заданным значением поля (без учета регистра)"""
+        return self.indexes[field].get(search_key(value), set())
+
+    def _get_ids_by_price(self, min_price=None, max_price=None):
+        """Множество id обуви в диапазоне цен (бинарный поиск по индексу цен)"""
+        return {shoe_id for _, shoe_id in self.price_index.irange(min_price, max_price)}
+
+    def _shoes_by_ids(self, ids):
+        """Обувь по набору id в порядке добавления"""
+        return [self.shoes[shoe_id] for shoe_id in sorted(ids)]
 
     def add_shoe(self, shoe_type, shoe_kind, color, price, manufacturer, size):
         """Добавить новую обувь"""
-        shoe = Shoe(self.next_id, shoe_type, shoe_kind, color, price, manufacturer, size)
-        self.shoes.append(shoe)
-        self.next_id += 1
+        shoe = Shoe(next(self._ids), shoe_type, shoe_kind, color, price, manufacturer, size)
+        self.shoes[shoe.shoe_id] = shoe
+        self._index_shoe(shoe)
         return shoe
 
     def get_all_shoes(self):
         """Получение всей обуви"""
-        return self.shoes
+        return list(self.shoes.values())
 
     def get_shoe_by_id(self, shoe_id):
         """Найти обувь по id"""
-        for shoe in self.shoes:
-            if shoe.shoe_id == shoe_id:
-                return shoe
-        return None
+        return self.shoes.get(shoe_id)
 
     def update_shoe(self, shoe_id, **kwargs):
         """Обновление данных обуви"""
@@ -53,58 +236,388 @@ class ShoeModel:
         if not shoe:
             return False
 
+        self._unindex_shoe(shoe)
         for key, value in kwargs.items():
-            if hasattr(shoe, key):
+            if key in Shoe.EDITABLE_FIELDS and hasattr(shoe, key):
                 setattr(shoe, key, value)
+        if any(field in kwargs for field in Shoe.SEARCH_FIELDS):
+            shoe.invalidate_search_keys()
+        self._index_shoe(shoe)
         return True
 
     def delete_shoe(self, shoe_id):
         """Удаление обуви"""
-        shoe = self.get_shoe_by_id(shoe_id)
-        if shoe:
-            self.shoes.remove(shoe)
+        shoe = self.shoes.pop(shoe_id, None)
+        if shoe is not None:
+            self._unindex_shoe(shoe)
             return True
         return False
 
     def get_shoes_by_type(self, shoe_type):
         """Получить обувь по типу (муж/жен)"""
-        return [shoe for shoe in self.shoes if shoe.shoe_type == shoe_type]
+        return self._shoes_by_ids(self._get_ids('shoe_type', shoe_type))
 
     def get_shoes_by_kind(self, shoe_kind):
         """Получить обувь по виду (кроссовки, сапоги и т.д)"""
-        return [shoe for shoe in self.shoes if shoe.shoe_kind == shoe_kind]
+        return self._shoes_by_ids(self._get_ids('shoe_kind', shoe_kind))
 
     def get_shoes_by_price_range(self, min_price, max_price):
         """Получение обуви в диапазоне цен"""
-        return [shoe for shoe in self.shoes if min_price <= shoe.price <= max_price]
+        return self._shoes_by_ids(self._get_ids_by_price(min_price, max_price))
+
+    def _group_ids(self, fields):
+        """Разбить id обуви на группы по значениям полей"""
+        if all(field in self.indexes for field in fields):
+            # Все поля проиндексированы - группы получаются пересечением множеств id
+            groups = {(): None}
+            for field in fields:
+                refined = {}
+                for key, ids in groups.items():
+                    for value, value_ids in self.indexes[field].items():
+                        group = value_ids if ids is None else ids & value_ids
+                        if group:
+                            refined[key + (value,)] = group
+                groups = refined
+            return groups
+
+        groups = {}
+        for shoe in self.shoes.values():
+            key = tuple(shoe.search_keys[Shoe.SEARCH_FIELDS.index(field)]
+                        if field in Shoe.SEARCH_FIELDS else getattr(shoe, field)
+                        for field in fields)
+            groups.setdefault(key, []).append(shoe.shoe_id)
+        return groups
+
+    def aggregate(self, group_by, value='price', percentiles=(50, 90)):
+        """Сводная статистика по группам.
+
+        group_by - поле или кортеж полей (shoe_type, shoe_kind, manufacturer,
+        color, size), value - числовое поле (price или size). Возвращает словарь
+        группа -> показатели summarize; категории сравниваются без учета регистра.
+        Пустой group_by или неизвестные поля - ValueError.
+        """
+        fields = aggregate_fields(group_by, value)
+        result = {}
+        for key, ids in self._group_ids(fields).items():
+            values = [getattr(self.shoes[shoe_id], value) for shoe_id in ids]
+            result[key[0] if isinstance(group_by, str) else key] = summarize(values, percentiles)
+        return result
+
+    def iter_search_shoes(self, shoe_type=None, shoe_kind=None, min_price=None, max_price=None,
+                          manufacturer=None, color=None):
+        """Поиск обуви за один проход.
+
+        Кандидаты берутся из самого селективного индекса, остальные условия
+        проверяются лениво. Выбранный индекс и число просмотренных кандидатов
+        сохраняются в last_search_stats.
+        """
+        criteria = {'shoe_type': shoe_type, 'shoe_kind': shoe_kind,
+                    'manufacturer': manufacturer, 'color': color}
+        criteria = {field: search_key(value) for field, value in criteria.items() if value}
+
+        plan = [(len(self._get_ids(field, value)), field) for field, value in criteria.items()]
+        if min_price is not None or max_price is not None:
+            plan.append((self.price_index.count(min_price, max_price), 'price'))
+
+        if plan:
+            candidates, index = min(plan)
+            if index == 'price':
+                ids = sorted(shoe_id for _, shoe_id in self.price_index.irange(min_price, max_price))
+            else:
+                ids = sorted(self._get_ids(index, criteria.pop(index)))
+            shoes = map(self.shoes.__getitem__, ids)
+        else:
+            index, candidates, shoes = None, len(self.shoes), self.shoes.values()
 
-    def search_shoes(self, shoe_type=None, shoe_kind=None, min_price=None, max_price=None):
+        # Оставшиеся условия сравниваются с готовыми ключами обуви по позиции
+        positions = [(Shoe.SEARCH_FIELDS.index(field), key) for field, key in criteria.items()]
+        stats = {'index': index, 'candidates': candidates, 'found': 0}
+        self.last_search_stats = stats
+
+        for shoe in shoes:
+            if min_price is not None and shoe.price < min_price:
+                continue
+            if max_price is not None and shoe.price > max_price:
+                continue
+            keys = shoe.search_keys
+            if all(keys[position] == key for position, key in positions):
+                stats['found'] += 1
+                yield shoe
+
+    def search_shoes(self, shoe_type=None, shoe_kind=None, min_price=None, max_price=None,
+                     manufacturer=None, color=None):
         """Универсальный поиск обуви"""
-        result = self.shoes[:]
+        return list(self.iter_search_shoes(shoe_type, shoe_kind, min_price, max_price,
+                                           manufacturer, color))
 
-        if shoe_type:
-            result = [shoe for shoe in result if shoe.shoe_type == shoe_type]
 
-        if shoe_kind:
-            result = [shoe for shoe in result if shoe.shoe_kind == shoe_kind]
+class ColumnarShoeModel:
+    """Колоночное хранилище обуви для больших каталогов.
 
-        if min_price is not None:
-            result = [shoe for shoe in result if shoe.price >= min_price]
+    Id, цены и размеры лежат в непрерывных массивах array, категориальные поля
+    закодированы небольшими целыми кодами (по байту на строку, пока значений
+    не больше 256). Фильтры по категориям считаются целиком по колонке через
+    bytes.translate и объединяются побитовым И. Объекты Shoe создаются только
+    для возвращаемых строк, поэтому изменения нужно вносить через update_shoe,
+    а не через полученный объект.
+    """
 
-        if max_price is not None:
-            result = [shoe for shoe in result if shoe.price <= max_price]
+    CATEGORY_FIELDS = Shoe.SEARCH_FIELDS
+    BYTE_CODES = 256  # сколько значений помещается в байтовую колонку кодов
 
+    def __init__(self):
+        self.ids = array('q')  # id по возрастанию, номер строки ищется бинарным поиском
+        self.prices = array('d')
+        self.sizes = array('d')
+        self.alive = bytearray()  # 1 - строка действует, 0 - удалена
+        self.codes = {field: bytearray() for field in self.CATEGORY_FIELDS}  # поле -> колонка кодов
+        self.values = {field: [] for field in self.CATEGORY_FIELDS}  # поле -> код -> значение
+        self._value_codes = {field: {} for field in self.CATEGORY_FIELDS}  # поле -> значение -> код
+        self._key_codes = {field: {} for field in self.CATEGORY_FIELDS}  # поле -> ключ поиска -> коды
+        self.count = 0  # количество действующих строк
+        self.last_search_stats = None
+        self._ids = count(1)
+
+    def _encode(self, field, value):
+        """Код значения категориального поля (новые значения добавляются в словарь)"""
+        value_codes = self._value_codes[field]
+        code = value_codes.get(value)
+        if code is None:
+            code = value_codes[value] = len(self.values[field])
+            self.values[field].append(value)
+            self._key_codes[field].setdefault(search_key(value), set()).add(code)
+            if code == self.BYTE_CODES:
+                # Значения перестали помещаться в байт - расширяем колонку
+                self.codes[field] = array('l', list(self.codes[field]))
+        return code
+
+    def _find_row(self, shoe_id):
+        """Номер действующей строки по id или None"""
+        row = bisect_left(self.ids, shoe_id)
+        if row < len(self.ids) and self.ids[row] == shoe_id and self.alive[row]:
+            return row
+        return None
+
+    def _make_shoe(self, row):
+        """Создать объект Shoe по номеру строки"""
+        codes, values = self.codes, self.values
+        return Shoe(self.ids[row],
+                    values['shoe_type'][codes['shoe_type'][row]],
+                    values['shoe_kind'][codes['shoe_kind'][row]],
+                    values['color'][codes['color'][row]],
+                    self.prices[row],
+                    values['manufacturer'][codes['manufacturer'][row]],
+                    self.sizes[row])
+
+    def _compact(self):
+        """Убрать удаленные строки из колонок"""
+        alive = self.alive
+        self.ids = array('q', compress(self.ids, alive))
+        self.prices = array('d', compress(self.prices, alive))
+        self.sizes = array('d', compress(self.sizes, alive))
+        for field, column in self.codes.items():
+            if isinstance(column, bytearray):
+                self.codes[field] = bytearray(compress(column, alive))
+            else:
+                self.codes[field] = array('l', compress(column, alive))
+        self.alive = bytearray(b'\x01') * len(self.ids)
+
+    def _codes_mask(self, field, codes):
+        """Маска строк (целое число), у которых код поля входит в codes"""
+        column = self.codes[field]
+        if isinstance(column, bytearray):
+            table = bytes(code in codes for code in range(256))
+            matches = column.translate(table)
+        else:
+            matches = bytes(map(codes.__contains__, column))
+        return int.from_bytes(matches, 'little')
+
+    def _category_mask(self, criteria):
+        """Байтовая маска действующих строк, подходящих под условия по категориям"""
+        mask = int.from_bytes(self.alive, 'little')
+
+        for field, value in criteria.items():
+            codes = self._key_codes[field].get(search_key(value))
+            if not codes:
+                return bytes(len(self.ids))
+            mask &= self._codes_mask(field, codes)
+
+        return mask.to_bytes(len(self.ids), 'little')
+
+    def _field_masks(self, field):
+        """Маски строк для каждого значения категориального поля"""
+        return {key: self._codes_mask(field, codes)
+                for key, codes in self._key_codes[field].items()}
+
+    def aggregate(self, group_by, value='price', percentiles=(50, 90)):
+        """Сводная статистика по группам (см. ShoeModel.aggregate).
+
+        Группы по категориям считаются пересечением масок колонок кодов.
+        Числовые поля (price, size) могут иметь почти столько же значений,
+        сколько строк, поэтому по ним строки каждой группы раскладываются
+        за один проход без масок на каждое значение.
+        """
+        fields = aggregate_fields(group_by, value)
+        categorical = [field for field in fields if field in self.codes]
+        numeric = [field for field in fields if field not in self.codes]
+        column = self.sizes if value == 'size' else self.prices
+        count = len(self.ids)
+
+        groups = {(): int.from_bytes(self.alive, 'little')}
+        for field in categorical:
+            field_masks = self._field_masks(field)
+            refined = {}
+            for key, mask in groups.items():
+                for field_value, field_mask in field_masks.items():
+                    group = mask & field_mask
+                    if group:
+                        refined[key + (field_value,)] = group
+            groups = refined
+
+        # значения групп: списки строк, если есть числовые поля, иначе маски
+        if numeric:
+            numeric_columns = [self.sizes if field == 'size' else self.prices for field in numeric]
+            rows_by_key = {}
+            for key, mask in groups.items():
+                for row in compress(range(count), mask.to_bytes(count, 'little')):
+                    group_key = key + tuple(numeric_column[row] for numeric_column in numeric_columns)
+                    rows = rows_by_key.get(group_key)
+                    if rows is None:
+                        rows_by_key[group_key] = [row]
+                    else:
+                        rows.append(row)
+            # ключ собран как (категории..., числа...): возвращаем порядок group_by
+            order = categorical + numeric
+            positions = [order.index(field) for field in fields]
+            groups = {tuple(key[i] for i in positions): rows for key, rows in rows_by_key.items()}
+
+        result = {}
+        for key, group in groups.items():
+            if numeric:
+                values = [column[row] for row in group]
+            else:
+                values = compress(column, group.to_bytes(count, 'little'))
+            result[key[0] if isinstance(group_by, str) else key] = summarize(values, percentiles)
         return result
 
+    def add_shoe(self, shoe_type, shoe_kind, color, price, manufacturer, size):
+        """Добавить новую обувь"""
+        row = len(self.ids)
+        self.ids.append(next(self._ids))
+        self.prices.append(price)
+        self.sizes.append(size)
+        values = {'shoe_type': shoe_type, 'shoe_kind': shoe_kind,
+                  'manufacturer': manufacturer, 'color': color}
+        for field, value in values.items():
+            code = self._encode(field, value)
+            self.codes[field].append(code)
+        self.alive.append(1)
+        self.count += 1
+        return self._make_shoe(row)
+
+    def get_all_shoes(self):
+        """Получение всей обуви"""
+        return [self._make_shoe(row) for row in compress(range(len(self.ids)), self.alive)]
+
+    def get_shoe_by_id(self, shoe_id):
+        """Найти обувь по id"""
+        row = self._find_row(shoe_id)
+        if row is None:
+            return None
+        return self._make_shoe(row)
+
+    def update_shoe(self, shoe_id, **kwargs):
+        """Обновление данных обуви"""
+        row = self._find_row(shoe_id)
+        if row is None:
+            return False
+
+        for key, value in kwargs.items():
+            if key == 'price':
+                self.prices[row] = value
+            elif key == 'size':
+                self.sizes[row] = value
+            elif key in self.codes:
+                code = self._encode(key, value)
+                self.codes[key][row] = code
+        return True
+
+    def delete_shoe(self, shoe_id):
+        """Удаление обуви (строка помечается удаленной, колонки сжимаются периодически)"""
+        row = self._find_row(shoe_id)
+        if row is None:
+            return False
+
+        self.alive[row] = 0
+        self.count -= 1
+        if self.count * 2 < len(self.ids):
+            self._compact()
+        return True
+
+    def get_shoes_by_type(self, shoe_type):
+        """Получить обувь по типу (муж/жен)"""
+        return self.search_shoes(shoe_type=shoe_type)
+
+    def get_shoes_by_kind(self, shoe_kind):
+        """Получить обувь по виду (кроссовки, сапоги и т.д)"""
+        return self.search_shoes(shoe_kind=shoe_kind)
+
+    def get_shoes_by_price_range(self, min_price, max_price):
+        """Получение обуви в диапазоне цен"""
+        return self.search_shoes(min_price=min_price, max_price=max_price)
+
+    def iter_search_shoes(self, shoe_type=None, shoe_kind=None, min_price=None, max_price=None,
+                          manufacturer=None, color=None):
+        """Поиск обуви по маскам колонок.
+
+        Если заданы категории, цена проверяется только у строк, прошедших
+        маску категорий, иначе - целиком по колонке цен.
+        """
+        criteria = {'shoe_type': shoe_type, 'shoe_kind': shoe_kind,
+                    'manufacturer': manufacturer, 'color': color}
+        criteria = {field: value for field, value in criteria.items() if value}
+        prices = self.prices
+
+        if criteria:
+            mask = self._category_mask(criteria)
+            rows = compress(range(len(mask)), mask)
+            candidates = mask.count(1)
+            if min_price is not None:
+                rows = (row for row in rows if prices[row] >= min_price)
+            if max_price is not None:
+                rows = (row for row in rows if prices[row] <= max_price)
+        else:
+            mask = int.from_bytes(self.alive, 'little')
+            if min_price is not None:
+                mask &= int.from_bytes(bytes(map(float(min_price).__le__, prices)), 'little')
+            if max_price is not None:
+                mask &= int.from_bytes(bytes(map(float(max_price).__ge__, prices)), 'little')
+            rows = compress(range(len(self.ids)), mask.to_bytes(len(self.ids), 'little'))
+            candidates = self.count
+
+        stats = {'index': 'columns', 'candidates': candidates, 'found': 0}
+        self.last_search_stats = stats
+
+        for row in rows:
+            stats['found'] += 1
+            yield self._make_shoe(row)
+
+    def search_shoes(self, shoe_type=None, shoe_kind=None, min_price=None, max_price=None,
+                     manufacturer=None, color=None):
+        """Универсальный поиск обуви"""
+        return list(self.iter_search_shoes(shoe_type, shoe_kind, min_price, max_price,
+                                           manufacturer, color))
+
 
 # Контроллер
 class ShoeController:
-    def __init__(self):
-        self.model = ShoeModel()
+    def __init__(self, model=None):
+        # Для больших каталогов можно передать ColumnarShoeModel()
+        self.model = model if model is not None else ShoeModel()
 
     def create_shoe(self, shoe_type, shoe_kind, color, price, manufacturer, size):
         """Создать новую обувь"""
-        if price <= 0:
+        if not isfinite(price) or price <= 0:
             return None, 'Цена должна быть положительной'
         if size <= 0:
             return None, 'Размер должен быть положительным'
@@ -122,6 +635,8 @@ class ShoeController:
 
     def update_shoe(self, shoe_id, **kwargs):
         """Обновление данных обуви"""
+        if 'price' in kwargs and (not isfinite(kwargs['price']) or kwargs['price'] <= 0):
+            return 'Цена должна быть положительной'
         if self.model.update_shoe(shoe_id, **kwargs):
             return 'Данные обновлены!'
         return 'Обувь не найдена'
@@ -132,9 +647,14 @@ class ShoeController:
             return 'Обувь удалена!'
         return 'Обувь не найдена'
 
-    def search_shoes(self, shoe_type=None, shoe_kind=None, min_price=None, max_price=None):
+    def get_statistics(self, group_by='shoe_kind', value='price', percentiles=(50, 90)):
+        """Сводная статистика по группам обуви"""
+        return self.model.aggregate(group_by, value, percentiles)
+
+    def search_shoes(self, shoe_type=None, shoe_kind=None, min_price=None, max_price=None,
+                     manufacturer=None, color=None):
         """Поиск обуви по критериям"""
-        return self.model.search_shoes(shoe_type, shoe_kind, min_price, max_price)
+        return self.model.search_shoes(shoe_type, shoe_kind, min_price, max_price, manufacturer, color)
 
 # Представление (View)
 
@@ -197,6 +717,12 @@ class ShoeView:
         print(f"Всего пар обуви: {len(shoes)}")
         print("=" * 40)
 
+        print("Цены по видам обуви:")
+        for kind, stats in self.controller.get_statistics('shoe_kind', percentiles=()).items():
+            print(f"{kind}: {stats['count']} пар, средняя {stats['mean']:.2f} руб., "
+                  f"от {stats['min']} до {stats['max']} руб.")
+        print("=" * 40)
+
     def find_shoe(self):
         """Найти обувь по id"""
         try:
@@ -1,4 +1,33 @@
+import re
+from bisect import bisect_left, insort
+from itertools import count
+
+
+# Слова из букв и цифр любого алфавита, в том числе кириллицы
+WORD_PATTERN = re.compile(r'\w+')
+
+# Вес вхождения слова в название относительно вхождения в описание
+NAME_WEIGHT = 3
+
+
+def tokenize(text):
+    """Разбить текст на нормализованные слова для поиска"""
+    return WORD_PATTERN.findall(text.casefold().replace('ё', 'е'))
+
+
+def normalize_ingredient(ingredient):
+    """Привести название ингредиента к виду для индекса"""
+    return ' '.join(ingredient.casefold().replace('ё', 'е').split())
+
+
 class Recipe:
+    __slots__ = ('recipe_id', 'name', 'author', 'recipe_type', 'description', 'ingredients',
+                 'cuisine', 'video_link', '_search_keys')
+
+    # Поля, которые можно менять через update_recipe
+    EDITABLE_FIELDS = ('name', 'author', 'recipe_type', 'description', 'ingredients',
+                       'cuisine', 'video_link')
+
     def __init__(self, recipe_id, name, author, recipe_type, description, ingredients, cuisine, video_link=None):
         self.recipe_id = recipe_id
         self.name = name
@@ -8,6 +37,22 @@ class Recipe:
         self.ingredients = ingredients  # список строк
         self.cuisine = cuisine
         self.video_link = video_link
+        self._search_keys = None
+
+    @property
+    def search_keys(self):
+        """Нормализованные слова названия и описания и ингредиенты, вычисляются один раз"""
+        if self._search_keys is None:
+            self._search_keys = (
+                tokenize(self.name),
+                tokenize(self.description),
+                frozenset(normalize_ingredient(ing) for ing in self.ingredients)
+            )
+        return self._search_keys
+
+    def invalidate_search_keys(self):
+        """Сбросить ключи поиска после изменения полей"""
+        self._search_keys = None
 
     def to_dict(self):
         """Преобразование объекта в словарь"""
@@ -28,27 +73,100 @@ class Recipe:
 
 
 class RecipeModel:
+    # Поля, по которым строятся индексы точного совпадения
+    INDEXED_FIELDS = ('recipe_type', 'cuisine')
+
     def __init__(self):
-        self.recipes = []
-        self.next_id = 1
+        self.recipes = {}  # id -> рецепт, порядок добавления сохраняется
+        self.indexes = {field: {} for field in self.INDEXED_FIELDS}  # поле -> значение -> множество id
+        self.text_index = {}  # слово -> {id рецепта: вес}
+        self.terms = []  # отсортированный словарь для поиска по префиксу
+        self.ingredient_index = {}  # ингредиент -> отсортированный список id рецептов
+        self._ids = count(1)  # next() у itertools.count атомарен: id не повторяются между потоками
+
+    def _index_text(self, recipe):
+        """Добавить название и описание рецепта в полнотекстовый индекс"""
+        name_terms, description_terms, _ = recipe.search_keys
+        weights = {}
+        for term in name_terms:
+            weights[term] = weights.get(term, 0) + NAME_WEIGHT
+        for term in description_terms:
+            weights[term] = weights.get(term, 0) + 1
+
+        for term, weight in weights.items():
+            postings = self.text_index.get(term)
+            if postings is None:
+                postings = self.text_index[term] = {}
+                insort(self.terms, term)
+            postings[recipe.recipe_id] = weight
+
+    def _unindex_text(self, recipe):
+        """Убрать рецепт из полнотекстового индекса"""
+        name_terms, description_terms, _ = recipe.search_keys
+        for term in set(name_terms).union(description_terms):
+            postings = self.text_index[term]
+            del postings[recipe.recipe_id]
+            if not postings:
+                del self.text_index[term]
+                del self.terms[bisect_left(self.terms, term)]
+
+    def _index_fields(self, recipe):
+        """Добавить рецепт в индексы по типу и кухне"""
+        for field, index in self.indexes.items():
+            index.setdefault(getattr(recipe, field), set()).add(recipe.recipe_id)
+
+    def _unindex_fields(self, recipe):
+        """Убрать рецепт из индексов по типу и кухне"""
+        for field, index in self.indexes.items():
+            value = getattr(recipe, field)
+            ids = index[value]
+            ids.discard(recipe.recipe_id)
+            if not ids:
+                del index[value]
+
+    def _index_ingredients(self, recipe):
+        """Добавить ингредиенты рецепта в индекс"""
+        for ingredient in recipe.search_keys[2]:
+            postings = self.ingredient_index.setdefault(ingredient, [])
+            if not postings or postings[-1] < recipe.recipe_id:
+                postings.append(recipe.recipe_id)
+            else:
+                insort(postings, recipe.recipe_id)
+
+    def _unindex_ingredients(self, recipe):
+        """Убрать ингредиенты рецепта из индекса"""
+        for ingredient in recipe.search_keys[2]:
+            postings = self.ingredient_index[ingredient]
+            del postings[bisect_left(postings, recipe.recipe_id)]
+            if not postings:
+                del self.ingredient_index[ingredient]
+
+    def _match_prefix(self, prefix):
+        """Объединенный список вхождений всех слов, начинающихся с prefix"""
+        matches = {}
+        position = bisect_left(self.terms, prefix)
+        while position < len(self.terms) and self.terms[position].startswith(prefix):
+            for recipe_id, weight in self.text_index[self.terms[position]].items():
+                matches[recipe_id] = matches.get(recipe_id, 0) + weight
+            position += 1
+        return matches
 
     def add_recipe(self, name, author, recipe_type, description, ingredients, cuisine, video_link=None):
         """Добавить новый рецепт"""
-        recipe = Recipe(self.next_id, name, author, recipe_type, description, ingredients, cuisine, video_link)
-        self.recipes.append(recipe)
-        self.next_id += 1
+        recipe = Recipe(next(self._ids), name, author, recipe_type, description, ingredients, cuisine, video_link)
+        self.recipes[recipe.recipe_id] = recipe
+        self._index_fields(recipe)
+        self._index_text(recipe)
+        self._index_ingredients(recipe)
         return recipe
 
     def get_all_recipes(self):
         """Получить все рецепты"""
-        return self.recipes
+        return list(self.recipes.values())
 
     def get_recipe_by_id(self, recipe_id):
         """Найти рецепт по id"""
-        for recipe in self.recipes:
-            if recipe.recipe_id == recipe_id:
-                return recipe
-        return None
+        return self.recipes.get(recipe_id)
 
     def update_recipe(self, recipe_id, **kwargs):
         """Обновить данные рецепта"""
@@ -56,44 +174,114 @@ class RecipeModel:
         if not recipe:
             return False
 
+        text_changed = 'name' in kwargs or 'description' in kwargs
+        ingredients_changed = 'ingredients' in kwargs
+        self._unindex_fields(recipe)
+        if text_changed:
+            self._unindex_text(recipe)
+        if ingredients_changed:
+            self._unindex_ingredients(recipe)
+
         for key, value in kwargs.items():
-            if hasattr(recipe, key):
+            if key in Recipe.EDITABLE_FIELDS and hasattr(recipe, key):
                 setattr(recipe, key, value)
+        if text_changed or ingredients_changed:
+            recipe.invalidate_search_keys()
+
+        self._index_fields(recipe)
+        if text_changed:
+            self._index_text(recipe)
+        if ingredients_changed:
+            self._index_ingredients(recipe)
         return True
 
     def delete_recipe(self, recipe_id):
         """Удалить рецепт"""
-        recipe = self.get_recipe_by_id(recipe_id)
-        if recipe:
-            self.recipes.remove(recipe)
+        recipe = self.recipes.pop(recipe_id, None)
+        if recipe is not None:
+            self._unindex_fields(recipe)
+            self._unindex_text(recipe)
+            self._unindex_ingredients(recipe)
             return True
         return False
 
+    def get_recipe_ids_by_type(self, recipe_type):
+        """Множество id рецептов заданного типа"""
+        return self.indexes['recipe_type'].get(recipe_type, set())
+
+    def get_recipe_ids_by_cuisine(self, cuisine):
+        """Множество id рецептов заданной кухни"""
+        return self.indexes['cuisine'].get(cuisine, set())
+
+    def get_recipe_ids_by_ingredient(self, ingredient):
+        """Отсортированный список id рецептов, где есть ингредиент (поиск по подстроке)"""
+        ingredient = normalize_ingredient(ingredient)
+        postings = [ids for name, ids in self.ingredient_index.items() if ingredient in name]
+        if len(postings) == 1:
+            return postings[0]
+        return sorted(set().union(*postings))
+
     def get_recipes_by_type(self, recipe_type):
         """Получить рецепты по типу (первое, второе и т.д.)"""
-        return [recipe for recipe in self.recipes if recipe.recipe_type == recipe_type]
+        return [self.recipes[recipe_id] for recipe_id in sorted(self.get_recipe_ids_by_type(recipe_type))]
 
     def get_recipes_by_cuisine(self, cuisine):
         """Получить рецепты по кухне"""
-        return [recipe for recipe in self.recipes if recipe.cuisine == cuisine]
+        return [self.recipes[recipe_id] for recipe_id in sorted(self.get_recipe_ids_by_cuisine(cuisine))]
 
     def get_recipes_by_ingredient(self, ingredient):
         """Найти рецепты по ингредиенту"""
-        result = []
-        for recipe in self.recipes:
-            if any(ingredient.lower() in ing.lower() for ing in recipe.ingredients):
-                result.append(recipe)
-        return result
+        return [self.recipes[recipe_id] for recipe_id in self.get_recipe_ids_by_ingredient(ingredient)]
+
+    def find_recipes_by_ingredients(self, all_of=(), any_of=(), none_of=()):
+        """Найти рецепты по нескольким ингредиентам.
+
+        all_of - все ингредиенты должны быть в рецепте, any_of - хотя бы один,
+        none_of - ни одного. Например, "яйца И бекон, но НЕ сливки":
+        find_recipes_by_ingredients(all_of=['яйца', 'бекон'], none_of=['сливки']).
+        """
+        required = sorted((self.get_recipe_ids_by_ingredient(ing) for ing in all_of), key=len)
+        if any_of:
+            required.append(sorted(set().union(*(self.get_recipe_ids_by_ingredient(ing) for ing in any_of))))
+
+        if required:
+            # Перебираем самый короткий список, остальные проверяем через множества
+            result, others = required[0], [set(ids) for ids in required[1:]]
+            if others:
+                result = [recipe_id for recipe_id in result
+                          if all(recipe_id in ids for ids in others)]
+        else:
+            result = list(self.recipes)
+
+        if none_of:
+            excluded = set().union(*(self.get_recipe_ids_by_ingredient(ing) for ing in none_of))
+            result = [recipe_id for recipe_id in result if recipe_id not in excluded]
+
+        return [self.recipes[recipe_id] for recipe_id in result]
+
+    def search_recipe_ids(self, search_term):
+        """Id рецептов, подходящих под запрос, по убыванию релевантности"""
+        terms = tokenize(search_term)
+        if not terms:
+            return list(self.recipes)
+
+        # Начинаем с самого редкого слова, чтобы пересечение было меньше
+        matches = sorted((self._match_prefix(term) for term in dict.fromkeys(terms)), key=len)
+        scores = matches[0]
+        for term_matches in matches[1:]:
+            scores = {recipe_id: score + term_matches[recipe_id]
+                      for recipe_id, score in scores.items() if recipe_id in term_matches}
+
+        return sorted(scores, key=lambda recipe_id: (-scores[recipe_id], recipe_id))
 
     def search_recipes(self, search_term):
-        """Поиск рецептов по названию или описанию"""
-        search_term = search_term.lower()
-        result = []
-        for recipe in self.recipes:
-            if (search_term in recipe.name.lower() or
-                    search_term in recipe.description.lower()):
-                result.append(recipe)
-        return result
+        """Поиск рецептов по названию или описанию.
+
+        Каждое слово запроса ищется как префикс слов из индекса, рецепт должен
+        содержать все слова запроса. Результаты упорядочены по релевантности:
+        совпадения в названии весят больше, чем в описании.
+        """
+        return [self.recipes[recipe_id] for recipe_id in self.search_recipe_ids(search_term)]
 
 
 class RecipeController:
@@ -132,22 +320,39 @@ class RecipeController:
         return "Рецепт не найден"
 
     def search_recipes(self, search_term=None, recipe_type=None, cuisine=None, ingredient=None):
-        """Поиск рецептов по различным критериям"""
-        results = self.model.get_all_recipes()
-
-        if search_term:
-            results = self.model.search_recipes(search_term)
-
+        """Поиск рецептов по различным критериям.
+
+        Рецепт должен подходить под все заданные критерии. Сначала берутся
+        дешевые индексы по типу и кухне: если они уже дают пустой результат,
+        поиск по ингредиенту и тексту не выполняется. Рецепты отдаются
+        по одному, без промежуточных списков.
+        """
+        filters = []
         if recipe_type:
-            results = [recipe for recipe in results if recipe.recipe_type == recipe_type]
-
+            filters.append(self.model.get_recipe_ids_by_type(recipe_type))
         if cuisine:
-            results = [recipe for recipe in results if recipe.cuisine == cuisine]
+            filters.append(self.model.get_recipe_ids_by_cuisine(cuisine))
+        if any(not ids for ids in filters):
+            return
 
         if ingredient:
-            results = self.model.get_recipes_by_ingredient(ingredient)
+            ingredient_ids = self.model.get_recipe_ids_by_ingredient(ingredient)
+            if not ingredient_ids:
+                return
+            filters.append(set(ingredient_ids))
 
-        return results
+        if search_term:
+            # Текстовый поиск задает порядок выдачи по релевантности
+            candidates = self.model.search_recipe_ids(search_term)
+        elif filters:
+            filters.sort(key=len)
+            candidates = sorted(filters.pop(0))
+        else:
+            candidates = self.model.recipes
+
+        for recipe_id in candidates:
+            if all(recipe_id in ids for ids in filters):
+                yield self.model.get_recipe_by_id(recipe_id)
 
 
 class RecipeView:
@@ -320,8 +525,6 @@ class RecipeView:
             print("Ошибка: введите число от 1 до 4")
             return
 
-        results = []
-
         if search_type == 1:
             search_term = input("Введите поисковый запрос: ")
             results = self.controller.search_recipes(search_term=search_term)
@@ -342,17 +545,22 @@ class RecipeView:
             print("Неверный выбор")
             return
 
-        if results:
-            print(f"\nНайдено {len(results)} рецептов:")
-            for recipe in results:
-                print(f"ID: {recipe.recipe_id} | {recipe}")
+        found_ids = set()
+        for recipe in results:
+            if not found_ids:
+                print("\nНайденные рецепты:")
+            found_ids.add(recipe.recipe_id)
+            print(f"ID: {recipe.recipe_id} | {recipe}")
+
+        if found_ids:
+            print(f"\nНайдено {len(found_ids)} рецептов")
 
             show_details = input("\nПоказать детали рецепта? (да/нет): ")
             if show_details.lower() == 'да':
                 try:
                     recipe_id = int(input("Введите ID рецепта: "))
                     recipe = self.controller.get_recipe(recipe_id)
-                    if recipe and recipe in results:
+                    if recipe and recipe_id in found_ids:
                         self.show_recipe_details(recipe)
                     else:
                         print("Рецепт не найден в результатах поиска")
@@ -0,0 +1,64 @@
+"""Замер пакетного создания заказов (OrderManager.create_orders).
+
+Строит N пар (пицца, стратегия цены), создает заказы одной пачкой
+во временном журнале и печатает число заказов в секунду. Для сравнения
+замеряется и создание по одному заказу (create_order) на N // 10 заказах.
+
+Запуск: python bench_bulk_orders.py [N] [plain|group]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from task_1 import (DiscountPriceStrategy, GroupCommitJournal, OrderJournal, OrderManager,
+                    Pizza, PizzaFactory, PizzaRecipe, Topping)
+
+
+def make_items(count):
+    """Пары (пицца, стратегия): 20 пицц, стандартная цена и скидка 10%"""
+    toppings = [PizzaFactory.register_topping(t) for t in
+                (Topping("Сыр", 50, 20), Topping("Грибы", 40, 15), Topping("Лук", 20, 5))]
+    pizzas = [Pizza(PizzaRecipe(f"Пицца {i}", 300 + i, 100, toppings[:i % 3 + 1]))
+              for i in range(20)]
+    strategies = [None, DiscountPriceStrategy(10)]
+    return [(pizzas[i % len(pizzas)], strategies[i % len(strategies)]) for i in range(count)]
+
+
+def run(count, journal_kind, bulk):
+    """Создает count заказов и возвращает (секунды, заказов в секунду)"""
+    items = make_items(count)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'orders.jsonl')
+        journal = GroupCommitJournal(filename) if journal_kind == 'group' else OrderJournal(filename)
+        # OrderLogger печатает каждый заказ - вывод в замер не входит
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager = OrderManager(journal)
+            start = time.perf_counter()
+            if bulk:
+                manager.create_orders(items)
+            else:
+                for pizza, strategy in items:
+                    manager.create_order(pizza, strategy)
+            manager.flush()
+            elapsed = time.perf_counter() - start
+            manager.close()
+    return elapsed, count / elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    journal_kind = sys.argv[2] if len(sys.argv) > 2 else 'plain'
+
+    elapsed, rate = run(count, journal_kind, bulk=True)
+    print(f"create_orders, {count} заказов ({journal_kind}): {elapsed:.2f} с, {rate:,.0f} заказов/с")
+    single = max(count // 10, 1)
+    elapsed, rate = run(single, journal_kind, bulk=False)
+    print(f"create_order,  {single} заказов ({journal_kind}): {elapsed:.2f} с, {rate:,.0f} заказов/с")
+
+
+if __name__ == '__main__':
+    main()
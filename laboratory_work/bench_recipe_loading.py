@@ -0,0 +1,86 @@
+"""Замер загрузки меню: старый формат (JSON-массив) против JSON Lines.
+
+Создает во временной папке меню из N рецептов в обоих форматах и для каждого
+печатает время load_recipes, пиковую память при загрузке (tracemalloc)
+и время первого get_recipe.
+
+Запуск: python bench_recipe_loading.py [N]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+
+from task_1 import PizzaFactory, PizzaRecipe, Topping
+
+
+def reset_factory():
+    """Очищает состояние фабрики между замерами (начинки остаются)"""
+    PizzaFactory._recipes.clear()
+    PizzaFactory._pending.clear()
+    PizzaFactory._saved_digests.clear()
+    PizzaFactory._invalidate_quotes()
+    PizzaFactory._dirty = False
+
+
+def make_menu(count, directory):
+    """Пишет меню из count рецептов в оба формата, возвращает пути к файлам"""
+    toppings = [PizzaFactory.register_topping(t) for t in
+                (Topping("Сыр", 50, 20), Topping("Грибы", 40, 15), Topping("Лук", 20, 5))]
+    recipes = [PizzaRecipe(f"Пицца {i}", 300 + i % 200, 100, toppings[:i % 3 + 1],
+                           f"Описание пиццы номер {i} " * 4)
+               for i in range(count)]
+
+    legacy = os.path.join(directory, 'recipes.json')
+    with open(legacy, 'w', encoding='utf-8') as f:
+        json.dump([asdict(recipe) for recipe in recipes], f, ensure_ascii=False)
+
+    lines = os.path.join(directory, 'recipes.jsonl')
+    for recipe in recipes:
+        PizzaFactory.add_recipe(recipe)
+    PizzaFactory.save_recipes(lines)
+    reset_factory()
+    return legacy, lines
+
+
+def measure(filename, name):
+    """Время загрузки, пиковая память и время первого обращения к рецепту.
+
+    tracemalloc сильно замедляет загрузку, поэтому память замеряется
+    отдельным прогоном.
+    """
+    reset_factory()
+    start = time.perf_counter()
+    PizzaFactory.load_recipes(filename)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    PizzaFactory.get_recipe(name)
+    first_access = time.perf_counter() - start
+
+    reset_factory()
+    tracemalloc.start()
+    PizzaFactory.load_recipes(filename)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return load_time, peak, first_access
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as directory:
+        legacy, lines = make_menu(count, directory)
+        name = f"Пицца {count // 2}"
+        for label, filename in (("JSON-массив", legacy), ("JSON Lines", lines)):
+            load_time, peak, first_access = measure(filename, name)
+            print(f"{label:12} {count} рецептов: загрузка {load_time * 1000:.0f} мс, "
+                  f"пик памяти {peak / 2 ** 20:.1f} МБ, первый get_recipe {first_access * 1000:.2f} мс")
+    reset_factory()
+
+
+if __name__ == '__main__':
+    main()
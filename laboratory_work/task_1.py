@@ -3,8 +3,29 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass, asdict
 from typing import List, Dict, Optional
 from enum import Enum
+from array import array
+from collections import OrderedDict
 import datetime
+import hashlib
+import itertools
+import math
 import os
+import queue
+import threading
+import time
+
+def atomic_write(filename: str, data: str):
+    """Атомарная запись файла: временный файл, fsync и переименование.
+
+    При сбое на диске остается либо старая, либо новая версия файла целиком.
+    """
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'w', encoding='utf-8') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_filename, filename)
+
 
 # Паттерн стратегия
 
@@ -16,11 +37,59 @@ class PriceStrategy(ABC):
         """Расчитывает итоговую цену на основе базовой"""
         pass
 
+    def cache_key(self):
+        """Ключ стратегии для кеша цен: линейные стратегии с одинаковыми
+        коэффициентами дают одинаковые цены, остальные различаются по экземпляру"""
+
+        coefficients = self.linear_coefficients()
+        return self if coefficients is None else coefficients
+
+    def linear_coefficients(self):
+        """Коэффициенты (scale, shift), если цена равна base_price * scale + shift.
+
+        Линейные стратегии сливаются в композиции в одну формулу;
+        None - стратегия нелинейная и вызывается как есть.
+        """
+        return None
+
+    def compile(self):
+        """Функция одного аргумента, считающая цену без диспетчеризации по стратегии"""
+
+        coefficients = self.linear_coefficients()
+        if coefficients is None:
+            return self.calculate_price
+        scale, shift = coefficients
+        if shift == 0:
+            return lambda base_price: base_price * scale
+        return lambda base_price: base_price * scale + shift
+
+    def calculate_prices(self, base_prices):
+        """Расчет цен для пачки базовых цен, возвращает array('d')"""
+
+        coefficients = self.linear_coefficients()
+        if coefficients is None:
+            price = self.compile()
+            return array('d', [price(base_price) for base_price in base_prices])
+        scale, shift = coefficients
+        if scale == 1 and shift == 0:
+            return array('d', base_prices)
+        if shift == 0:
+            return array('d', [base_price * scale for base_price in base_prices])
+        return array('d', [base_price * scale + shift for base_price in base_prices])
+
+    @property
+    def name(self):
+        """Название стратегии для статистики"""
+        return type(self).__name__
+
 class StandardPriceStrategy(PriceStrategy):
     """Стандартная цена (без изменений)"""
     def calculate_price(self, base_price: float):
         return base_price
 
+    def linear_coefficients(self):
+        return 1, 0
+
 class DiscountPriceStrategy(PriceStrategy):
     """Цена со скидкой"""
 
@@ -31,6 +100,83 @@ class DiscountPriceStrategy(PriceStrategy):
         """Расчет цены со скидкой"""
         return base_price * (1 - self.discount)
 
+    def linear_coefficients(self):
+        return 1 - self.discount, 0
+
+    @property
+    def name(self):
+        return f'{type(self).__name__}({self.discount * 100:g}%)'
+
+class CompositePriceStrategy(PriceStrategy):
+    """Последовательное применение нескольких стратегий (например, скидка,
+    счастливый час и карта лояльности).
+
+    Композиция компилируется один раз при создании: подряд идущие линейные
+    стратегии сливаются в одну формулу, остальные вызываются по цепочке.
+    """
+
+    def __init__(self, *strategies: PriceStrategy):
+        self.strategies = strategies
+        # слияние подряд идущих линейных стратегий в шаги (scale, shift) или функции
+        steps = []
+        for strategy in strategies:
+            coefficients = strategy.linear_coefficients()
+            if coefficients is None:
+                steps.append(strategy.compile())
+            elif steps and isinstance(steps[-1], tuple):
+                scale, shift = steps[-1]
+                steps[-1] = (scale * coefficients[0], shift * coefficients[0] + coefficients[1])
+            else:
+                steps.append(coefficients)
+        self._steps = steps
+        self._kernel = self._build_kernel()
+
+    def _build_kernel(self):
+        if not self._steps:
+            return lambda base_price: base_price
+        functions = [_LinearStep(*step).compile() if isinstance(step, tuple) else step
+                     for step in self._steps]
+        if len(functions) == 1:
+            return functions[0]
+
+        def kernel(base_price):
+            for function in functions:
+                base_price = function(base_price)
+            return base_price
+        return kernel
+
+    def calculate_price(self, base_price: float):
+        return self._kernel(base_price)
+
+    def linear_coefficients(self):
+        if not self._steps:
+            return 1, 0
+        if len(self._steps) == 1 and isinstance(self._steps[0], tuple):
+            return self._steps[0]
+        return None
+
+    def compile(self):
+        return self._kernel
+
+    @property
+    def name(self):
+        return '+'.join(strategy.name for strategy in self.strategies) or type(self).__name__
+
+class _LinearStep(PriceStrategy):
+    """Слитая линейная часть композиции"""
+
+    def __init__(self, scale: float, shift: float):
+        self.scale = scale
+        self.shift = shift
+
+    def calculate_price(self, base_price: float):
+        return base_price * self.scale + self.shift
+
+    def linear_coefficients(self):
+        return self.scale, self.shift
+
+STANDARD_PRICE = StandardPriceStrategy()  # общий экземпляр стратегии по умолчанию
+
 class OrderObserver(ABC):
     """Абстрактный класс - наблюдение за заказами"""
 
@@ -39,6 +185,11 @@ class OrderObserver(ABC):
         """Метод, вызываемый при изменении состояния заказа"""
         pass
 
+    def update_batch(self, orders: List['Order']):
+        """Метод, вызываемый один раз для пачки заказов"""
+        for order in orders:
+            self.update(order)
+
 class OrderLogger(OrderObserver):
     """Класс для логирования создания заказов"""
 
@@ -46,16 +197,241 @@ class OrderLogger(OrderObserver):
         """Логирует информация о созданном заказе"""
         print(f'Заказ #{order.order_id} создан: {order.pizza.name}')
 
+    def update_batch(self, orders: List['Order']):
+        """Логирует пачку заказов одной строкой"""
+        if orders:
+            print(f'Создано заказов: {len(orders)} (#{orders[0].order_id} - #{orders[-1].order_id})')
+
+class SalesTotals:
+    """Накопительные итоги продаж: количество заказов, выручка и себестоимость"""
+
+    __slots__ = ('orders', 'revenue', 'cost')
+
+    def __init__(self):
+        self.orders = 0
+        self.revenue = 0.0
+        self.cost = 0.0
+
+    @property
+    def profit(self):
+        return self.revenue - self.cost
+
+    def add(self, order: 'Order'):
+        self.orders += 1
+        self.revenue += order.total_price
+        self.cost += order.total_cost
+
+    def add_totals(self, orders: int, revenue: float, cost: float):
+        self.orders += orders
+        self.revenue += revenue
+        self.cost += cost
+
+    def to_dict(self):
+        return {
+            'orders': self.orders,
+            'revenue': self.revenue,
+            'cost': self.cost,
+            'profit': self.profit
+        }
+
 class StatisticsTracker(OrderObserver):
-    """Класс для отслеживания статистики продаж"""
+    """Класс для отслеживания статистики продаж.
+
+    Итоги обновляются при каждом заказе, поэтому статистика доступна за O(1)
+    без обхода всех заказов.
+    """
 
     def __init__(self):
-        self.total_orders = 0
-        self.total_revenue = 0.0
+        self.totals = SalesTotals()
+        self.by_pizza: Dict[str, SalesTotals] = {}
+        self.by_strategy: Dict[str, SalesTotals] = {}
+
+    @property
+    def total_orders(self):
+        return self.totals.orders
+
+    @property
+    def total_revenue(self):
+        return self.totals.revenue
+
+    @property
+    def total_cost(self):
+        return self.totals.cost
+
+    @property
+    def total_profit(self):
+        return self.totals.profit
 
     def update(self, order: 'Order'):
-        self.total_orders += 1
-        self.total_revenue += order.total_price
+        self.totals.add(order)
+        pizza_totals = self.by_pizza.get(order.pizza.name)
+        if pizza_totals is None:
+            pizza_totals = self.by_pizza[order.pizza.name] = SalesTotals()
+        pizza_totals.add(order)
+        strategy_name = order.price_strategy.name
+        strategy_totals = self.by_strategy.get(strategy_name)
+        if strategy_totals is None:
+            strategy_totals = self.by_strategy[strategy_name] = SalesTotals()
+        strategy_totals.add(order)
+
+    def update_batch(self, orders: List['Order']):
+        """Пачка заказов сначала суммируется по парам (пицца, стратегия),
+        итоги обновляются один раз на пару"""
+
+        groups = {}
+        for order in orders:
+            key = (order.pizza.name, order.price_strategy)
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [1, order.total_price, order.total_cost]
+            else:
+                group[0] += 1
+                group[1] += order.total_price
+                group[2] += order.total_cost
+
+        for (pizza_name, strategy), (count, revenue, cost) in groups.items():
+            self.totals.add_totals(count, revenue, cost)
+            for breakdown, name in ((self.by_pizza, pizza_name), (self.by_strategy, strategy.name)):
+                totals = breakdown.get(name)
+                if totals is None:
+                    totals = breakdown[name] = SalesTotals()
+                totals.add_totals(count, revenue, cost)
+
+    def get_statistics(self):
+        """Итоговая статистика с разбивкой по пиццам и стратегиям цены"""
+
+        return {
+            'total_orders': self.total_orders,
+            'total_revenue': self.total_revenue,
+            'total_cost': self.total_cost,
+            'total_profit': self.total_profit,
+            'by_pizza': {name: t.to_dict() for name, t in self.by_pizza.items()},
+            'by_strategy': {name: t.to_dict() for name, t in self.by_strategy.items()}
+        }
+
+class DeliveryPolicy(Enum):
+    """Поведение шины наблюдателей при переполненной очереди подписчика"""
+
+    BLOCK = 'block'  # ждать освобождения места (обратное давление)
+    DROP = 'drop'    # отбросить событие для этого подписчика
+
+class ObserverSubscription:
+    """Подписчик шины: собственная ограниченная очередь, поток-обработчик
+    и счетчики доставки"""
+
+    def __init__(self, observer: OrderObserver, maxsize: int):
+        self.observer = observer
+        self.queue = queue.Queue(maxsize)
+        self.events = 0  # обработано событий (пачка - одно событие)
+        self.delivered = 0  # обработано заказов
+        self.dropped = 0  # отброшено событий
+        self.errors = 0
+        self.total_latency = 0.0  # сумма по событиям: от публикации до конца обработки, секунды
+        self.max_latency = 0.0
+        self.thread = threading.Thread(target=self._run, daemon=True,
+                                       name=f'observer-{type(observer).__name__}')
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                payload, published, batch = item
+                try:
+                    if batch:
+                        self.observer.update_batch(payload)
+                    else:
+                        self.observer.update(payload)
+                except Exception:
+                    self.errors += 1
+                latency = time.perf_counter() - published
+                self.events += 1
+                self.delivered += len(payload) if batch else 1
+                self.total_latency += latency
+                if latency > self.max_latency:
+                    self.max_latency = latency
+            finally:
+                self.queue.task_done()
+
+    def get_stats(self):
+        return {
+            'events': self.events,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'queued': self.queue.qsize(),
+            'avg_latency': self.total_latency / self.events if self.events else 0.0,  # на событие
+            'max_latency': self.max_latency
+        }
+
+class ObserverBus:
+    """Асинхронная доставка событий о заказах наблюдателям.
+
+    Каждый подписчик обрабатывает события в своем потоке из своей ограниченной
+    очереди, поэтому медленный наблюдатель не задерживает создание заказа
+    и других наблюдателей. При переполнении очереди поведение задает policy.
+    События одному подписчику доставляются по порядку и из одного потока.
+    """
+
+    def __init__(self, maxsize: int = 1000, policy: DeliveryPolicy = DeliveryPolicy.BLOCK):
+        self.maxsize = maxsize
+        self.policy = policy
+        self._subscriptions: List[ObserverSubscription] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def subscribe(self, observer: OrderObserver):
+        """Подписывает наблюдателя на события шины"""
+        self._subscriptions.append(ObserverSubscription(observer, self.maxsize))
+
+    def publish(self, order: 'Order'):
+        """Передает заказ всем подписчикам, не дожидаясь обработки"""
+        self._publish((order, time.perf_counter(), False))
+
+    def publish_batch(self, orders: List['Order']):
+        """Передает пачку заказов подписчикам одним событием (update_batch)"""
+        self._publish((orders, time.perf_counter(), True))
+
+    def _publish(self, item):
+        if self._closed:
+            raise RuntimeError('Шина наблюдателей закрыта')
+        for subscription in self._subscriptions:
+            if self.policy is DeliveryPolicy.BLOCK:
+                subscription.queue.put(item)
+                continue
+            try:
+                subscription.queue.put_nowait(item)
+            except queue.Full:
+                with self._lock:
+                    subscription.dropped += 1
+
+    def flush(self, observer: OrderObserver = None):
+        """Ждет обработки всех опубликованных событий (или только событий
+        указанного наблюдателя)"""
+
+        for subscription in self._subscriptions:
+            if observer is None or subscription.observer is observer:
+                subscription.queue.join()
+
+    def close(self):
+        """Доставляет оставшиеся события и останавливает потоки подписчиков.
+
+        Счетчики подписчиков остаются доступны через get_stats.
+        """
+
+        if self._closed:
+            return
+        self._closed = True
+        for subscription in self._subscriptions:
+            subscription.queue.put(None)
+        for subscription in self._subscriptions:
+            subscription.thread.join()
+
+    def get_stats(self):
+        """Счетчики доставки и задержки по каждому наблюдателю"""
+        return {type(s.observer).__name__: s.get_stats() for s in self._subscriptions}
 
 @dataclass
 class Topping:
@@ -79,8 +455,40 @@ class Pizza:
     """Класс для представления приготовленной пиццы по рецепту"""
 
     def __init__(self, recipe: PizzaRecipe, custom_toppings: List[Topping] = None):
-        self.recipe = recipe
-        self.custom_toppings = custom_toppings or []
+        self._recipe = recipe
+        self._custom_toppings = list(custom_toppings or [])
+        self._all_toppings = None
+        self._totals = None  # (цена начинок, себестоимость начинок, ревизия цен фабрики)
+
+    def _invalidate(self):
+        """Сбрасывает закешированные начинки и суммы"""
+        self._all_toppings = None
+        self._totals = None
+
+    @property
+    def recipe(self):
+        """Рецепт пиццы"""
+        return self._recipe
+
+    @recipe.setter
+    def recipe(self, recipe: PizzaRecipe):
+        self._recipe = recipe
+        self._invalidate()
+
+    @property
+    def custom_toppings(self):
+        """Дополнительные начинки (для изменения - add_topping или присваивание)"""
+        return tuple(self._custom_toppings)
+
+    @custom_toppings.setter
+    def custom_toppings(self, toppings: List[Topping]):
+        self._custom_toppings = list(toppings)
+        self._invalidate()
+
+    def add_topping(self, topping: Topping):
+        """Добавляет дополнительную начинку"""
+        self._custom_toppings.append(topping)
+        self._invalidate()
 
     @property
     def name(self):
@@ -90,7 +498,21 @@ class Pizza:
     @property
     def all_toppings(self):
         """Все начинки для пиццы"""
-        return self.recipe.toppings + self.custom_toppings
+        if self._all_toppings is None:
+            self._all_toppings = self.recipe.toppings + self._custom_toppings
+        return self._all_toppings
+
+    def _topping_totals(self):
+        """Суммарные цена и себестоимость начинок.
+
+        Пересчитываются только после изменения начинок или рецепта пиццы
+        либо цен начинок в фабрике.
+        """
+        revision = PizzaFactory.price_revision
+        if self._totals is None or self._totals[2] != revision:
+            toppings = self.all_toppings
+            self._totals = (sum(t.price for t in toppings), sum(t.cost for t in toppings), revision)
+        return self._totals
 
     @property
     def base_price(self):
@@ -104,73 +526,255 @@ class Pizza:
 
     def get_total_cost(self):
         """Полная себестоимость пиццы"""
-        toppings_cost = sum(t.cost for t in self.all_toppings)
-        return self.base_cost + toppings_cost
+        return self.base_cost + self._topping_totals()[1]
+
+    def get_list_price(self):
+        """Цена пиццы с начинками до применения стратегии цены"""
+        return self.base_price + self._topping_totals()[0]
 
     def get_total_price(self, strategy: PriceStrategy = None):
         """Полная цена пиццы с учетом ценообразования"""
-
-        if strategy is None:
-            strategy = StandardPriceStrategy()
-
-        toppings_price = sum(t.price for t in self.all_toppings)
-        base_price = self.base_price + toppings_price
-        return strategy.calculate_price(base_price)
+        return (strategy or STANDARD_PRICE).calculate_price(self.get_list_price())
 
 class PizzaFactory:
     """Паттерн фабрика - для создания пицц"""
     _recipes: Dict[str, PizzaRecipe] = {}
+    _dirty = False  # были ли изменения после последней загрузки или сохранения
+    _saved_digests: Dict[str, str] = {}  # файл -> хеш последнего загруженного/сохраненного содержимого
+    _pending: Dict[str, tuple] = {}  # имя -> (файл, смещение строки) для еще не разобранных рецептов
+    _toppings: Dict[str, Topping] = {}  # реестр начинок: имя -> общий экземпляр
+    RECIPES_FILE = 'recipes.jsonl'
+    LEGACY_RECIPES_FILE = 'recipes.json'  # меню в старом формате (JSON-массив)
+    price_revision = 0  # растет при каждом изменении цен начинок
+    # LRU-кеш цен: (рецепт, начинки, стратегия) -> (цена до стратегии, цена, себестоимость)
+    quote_cache_size = 1024
+    _quotes: OrderedDict = OrderedDict()
+    _quotes_revision = 0  # price_revision, при котором заполнялся кеш
+    quote_hits = 0
+    quote_misses = 0
+
+    @staticmethod
+    def _digest(data: str):
+        """Хеш содержимого файла рецептов"""
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def register_topping(cls, topping: Topping):
+        """Возврат общего экземпляра начинки с таким именем.
+
+        Если начинки еще нет в реестре, она регистрируется. Все рецепты и пиццы
+        ссылаются на один экземпляр, поэтому изменение цены начинки - одна операция.
+        """
+
+        registered = cls._toppings.get(topping.name)
+        if registered is None:
+            registered = cls._toppings[topping.name] = topping
+            cls._dirty = True
+        return registered
+
+    @classmethod
+    def get_topping(cls, name: str):
+        """Возврат начинки из реестра по имени"""
+
+        return cls._toppings.get(name)
+
+    @classmethod
+    def get_all_toppings(cls):
+        """Список всех начинок из реестра"""
+
+        return list(cls._toppings.values())
+
+    @classmethod
+    def update_topping(cls, name: str, price: float = None, cost: float = None):
+        """Изменение цены и себестоимости начинки во всех рецептах сразу"""
+
+        topping = cls._toppings.get(name)
+        if topping is None:
+            return False
+        if price is not None:
+            topping.price = price
+        if cost is not None:
+            topping.cost = cost
+        cls.price_revision += 1  # кеш цен сбрасывается при следующем обращении
+        cls._dirty = True
+        return True
+
+    @classmethod
+    def _load_topping(cls, topping_data: dict):
+        """Загрузка начинки из файла: значения из файла заменяют текущие"""
+
+        topping = cls._toppings.get(topping_data['topping'])
+        if topping is None:
+            topping = Topping(topping_data['topping'], topping_data['price'], topping_data['cost'])
+            cls._toppings[topping.name] = topping
+        elif (topping.price, topping.cost) != (topping_data['price'], topping_data['cost']):
+            topping.price = topping_data['price']
+            topping.cost = topping_data['cost']
+            cls.price_revision += 1
+
+    @classmethod
+    def _parse_recipe(cls, recipe_data: dict):
+        """Создание рецепта из словаря, прочитанного из файла.
+
+        Начинки в файле задаются именем из реестра; старый формат с полным
+        описанием начинки тоже поддерживается.
+        """
+
+        toppings = [cls._toppings[t] if isinstance(t, str) else cls.register_topping(Topping(**t))
+                    for t in recipe_data['toppings']]
+        return PizzaRecipe(
+            name=recipe_data['name'],
+            base_price=recipe_data['base_price'],
+            base_cost=recipe_data['base_cost'],
+            toppings=toppings,
+            description=recipe_data.get('description', '')
+        )
+
+    @staticmethod
+    def _read_name(line: str):
+        """Имя рецепта из строки файла без разбора всей строки"""
+
+        if not line.startswith('{"name":'):
+            return json.loads(line)['name']
+        start = line.index('"', len('{"name":')) + 1
+        return json.decoder.scanstring(line, start)[0]
 
     @classmethod
-    def load_recipes(cls, filename: str = 'recipes.json'):
-        """Загрузка рецептов из JSON файла"""
-
-        if os.path.exists(filename):
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                for recipe_data in data:
-                    toppings = [Topping(**t) for t in recipe_data['toppings']]
-                    recipe = PizzaRecipe(
-                        name=recipe_data['name'],
-                        base_price=recipe_data['base_price'],
-                        base_cost=recipe_data['base_cost'],
-                        toppings=toppings,
-                        description=recipe_data.get('description', '')
-                    )
+    def load_recipes(cls, filename: str = None):
+        """Загрузка рецептов из файла.
+
+        Файл в формате JSON Lines: сначала строки начинок, затем по рецепту
+        на строку. Начинки загружаются сразу, а рецепты только индексируются:
+        запоминается смещение строки каждого рецепта, а сам рецепт разбирается
+        при первом обращении. Старый формат (JSON-массив) загружается целиком.
+
+        Без имени файла читается RECIPES_FILE, а если его еще нет -
+        старый LEGACY_RECIPES_FILE; следующее сохранение перенесет меню
+        в новый файл, старый остается нетронутым.
+        """
+
+        if filename is None:
+            filename = cls.RECIPES_FILE
+            if not os.path.exists(filename) and os.path.exists(cls.LEGACY_RECIPES_FILE):
+                filename = cls.LEGACY_RECIPES_FILE
+        if not os.path.exists(filename):
+            return
+
+        cls._invalidate_quotes()
+        with open(filename, 'rb') as f:
+            if f.read(1) == b'[':
+                content = f.read().decode('utf-8')
+                cls._saved_digests[filename] = cls._digest('[' + content)
+                for recipe_data in json.loads('[' + content):
+                    recipe = cls._parse_recipe(recipe_data)
+                    cls._pending.pop(recipe.name, None)
                     cls._recipes[recipe.name] = recipe
+                return
+
+            f.seek(0)
+            digest = hashlib.sha256()
+            offset = 0
+            for line in f:
+                digest.update(line)
+                if line.startswith(b'{"topping"'):
+                    cls._load_topping(json.loads(line))
+                elif line.strip():
+                    name = cls._read_name(line.decode('utf-8'))
+                    # None - место рецепта в порядке меню, сам рецепт еще не разобран
+                    cls._recipes[name] = None
+                    cls._pending[name] = (filename, offset)
+                offset += len(line)
+
+        cls._saved_digests[filename] = digest.hexdigest()
 
     @classmethod
-    def save_recipes(cls, filename: str = 'recipes.json'):
-        """Сохранение рецептов в JSON файл"""
+    def _load_pending(cls, names):
+        """Разбор отложенных рецептов (каждый файл открывается один раз)"""
+
+        by_file: Dict[str, list] = {}
+        for name in names:
+            filename, offset = cls._pending.pop(name)
+            by_file.setdefault(filename, []).append(offset)
+
+        for filename, offsets in by_file.items():
+            with open(filename, 'rb') as f:
+                for offset in sorted(offsets):
+                    f.seek(offset)
+                    recipe = cls._parse_recipe(json.loads(f.readline()))
+                    cls._recipes[recipe.name] = recipe
 
-        data = []
-        for recipe in cls._recipes.values():
+    @classmethod
+    def save_recipes(cls, filename: str = None, compact: bool = True):
+        """Сохранение рецептов в файл JSON Lines.
+
+        Файл перезаписывается атомарно. Если рецепты не менялись или получилось
+        то же содержимое, что уже лежит в файле, запись пропускается.
+        compact=False разделяет поля пробелами для чтения человеком.
+        Возвращает True, если файл был записан.
+        """
+
+        filename = filename or cls.RECIPES_FILE
+        if not cls._dirty and filename in cls._saved_digests:
+            return False
+
+        separators = (',', ':') if compact else (', ', ': ')
+        recipes = cls.get_all_recipes()
+        lines = []
+        for topping in cls._toppings.values():
+            topping_data = {'topping': topping.name, 'price': topping.price, 'cost': topping.cost}
+            lines.append(json.dumps(topping_data, ensure_ascii=False, separators=separators) + '\n')
+        for recipe in recipes:
             recipe_data = asdict(recipe)
-            recipe_data['toppings'] = [asdict(t) for t in recipe.toppings]
-            data.append(recipe_data)
+            recipe_data['toppings'] = [t.name for t in recipe.toppings]
+            lines.append(json.dumps(recipe_data, ensure_ascii=False, separators=separators) + '\n')
+        content = ''.join(lines)
+
+        digest = cls._digest(content)
+        cls._dirty = False
+        if cls._saved_digests.get(filename) == digest:
+            return False
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        atomic_write(filename, content)
+        cls._saved_digests[filename] = digest
+        return True
 
     @classmethod
     def get_recipe(cls, name: str):
-        """Возврат рецепта по имени"""
+        """Возврат рецепта по имени (отложенный рецепт разбирается при первом обращении)"""
 
+        if name in cls._pending:
+            cls._load_pending([name])
         return cls._recipes.get(name)
 
     @classmethod
     def get_all_recipes(cls):
         """Список всех доступных рецептов"""
 
+        if cls._pending:
+            cls._load_pending(list(cls._pending))
         return list(cls._recipes.values())
 
+    @classmethod
+    def add_recipe(cls, recipe: PizzaRecipe):
+        """Регистрация рецепта в фабрике"""
+
+        recipe.toppings = [cls.register_topping(t) for t in recipe.toppings]
+        if cls.get_recipe(recipe.name) != recipe:
+            cls._recipes[recipe.name] = recipe
+            cls._invalidate_quotes(recipe.name)
+            cls._dirty = True
+
     @classmethod
     def create_custom_recipe(cls, name: str, base_price: float, base_cost: float,
                              toppings: List[Topping], description: str = ""):
         """Создание и сохранение нового пользовательского рецепта"""
 
+        toppings = [cls.register_topping(t) for t in toppings]
         recipe = PizzaRecipe(name, base_price, base_cost, toppings, description)
+        cls._pending.pop(name, None)
         cls._recipes[name] = recipe
+        cls._invalidate_quotes(name)
+        cls._dirty = True
         return recipe
 
     @classmethod
@@ -179,28 +783,381 @@ class PizzaFactory:
 
         if name in cls._recipes:
             del cls._recipes[name]
+            cls._pending.pop(name, None)
+            cls._invalidate_quotes(name)
+            cls._dirty = True
+
+    @classmethod
+    def _invalidate_quotes(cls, name: str = None):
+        """Удаляет из кеша цены рецепта name (или все цены)"""
+
+        if name is None:
+            cls._quotes.clear()
+            return
+        for key in [key for key in cls._quotes if key[0] == name]:
+            del cls._quotes[key]
+
+    @classmethod
+    def quote(cls, pizza: Pizza, strategy: PriceStrategy = None):
+        """Цена до стратегии, цена и себестоимость пиццы с кешированием.
+
+        Кешируются только пиццы по зарегистрированному рецепту с начинками
+        из реестра; ключ - имя рецепта, отсортированные имена дополнительных
+        начинок и ключ стратегии. Кеш ограничен quote_cache_size записями
+        и вытесняет давно не использованные.
+        """
+
+        strategy = strategy or STANDARD_PRICE
+        recipe = pizza.recipe
+        names = []
+        cacheable = cls._recipes.get(recipe.name) is recipe
+        registry = cls._toppings
+        for topping in pizza._custom_toppings:
+            if registry.get(topping.name) is not topping:
+                cacheable = False
+                break
+            names.append(topping.name)
+        if not cacheable:
+            list_price = pizza.get_list_price()
+            return list_price, strategy.calculate_price(list_price), pizza.get_total_cost()
+
+        if cls._quotes_revision != cls.price_revision:
+            cls._quotes.clear()
+            cls._quotes_revision = cls.price_revision
+
+        names.sort()
+        key = (recipe.name, tuple(names), strategy.cache_key())
+        quote = cls._quotes.get(key)
+        if quote is not None:
+            cls.quote_hits += 1
+            cls._quotes.move_to_end(key)
+            return quote
+
+        cls.quote_misses += 1
+        list_price = pizza.get_list_price()
+        quote = (list_price, strategy.calculate_price(list_price), pizza.get_total_cost())
+        cls._quotes[key] = quote
+        if len(cls._quotes) > cls.quote_cache_size:
+            cls._quotes.popitem(last=False)
+        return quote
+
+    @classmethod
+    def get_quote_cache_stats(cls):
+        """Счетчики кеша цен для подбора его размера"""
+        return {
+            'hits': cls.quote_hits,
+            'misses': cls.quote_misses,
+            'size': len(cls._quotes),
+            'maxsize': cls.quote_cache_size
+        }
+
+class OrderJournal:
+    """Журнал заказов в формате JSON Lines: одна строка - один заказ.
+
+    Запись заказа - одна операция write в конец файла и, если нужна гарантия
+    сохранности, fsync. После сбоя проверяется только хвост файла:
+    недописанная последняя строка отрезается.
+    """
+
+    BLOCK_SIZE = 4096
+    LEGACY_FILENAME = 'order.json'  # заказы в старом формате (JSON-массив)
+    CHUNK_SIZE = 10000  # записей на одну сериализацию в append_many
+    # один кодировщик на все записи: json.dumps с ensure_ascii=False
+    # создает новый JSONEncoder при каждом вызове
+    _encode = json.JSONEncoder(ensure_ascii=False).encode
+
+    def __init__(self, filename: str = 'orders.jsonl', sync: bool = False):
+        self.filename = filename
+        self.sync = sync
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        """Открывает журнал на дозапись, предварительно восстанавливая хвост"""
+        if self._file is None:
+            self.recover()
+            self._file = open(self.filename, 'a', encoding='utf-8')
+        return self._file
+
+    def append(self, record: dict):
+        """Дописывает заказ в конец журнала"""
+        self.append_many([record])
+
+    def append_many(self, records: List[dict]):
+        """Дописывает несколько заказов одной операцией записи"""
+        encode = self._encode
+        self.append_lines([encode(record) + '\n' for record in records])
+
+    def append_lines(self, lines: List[str]):
+        """Дописывает готовые строки JSON Lines (каждая оканчивается '\\n').
+
+        Большие пачки склеиваются частями по CHUNK_SIZE строк, чтобы
+        не собирать в памяти весь текст сразу; fsync выполняется один раз.
+        """
+        with self._lock:
+            f = self._open()
+            for start in range(0, len(lines), self.CHUNK_SIZE):
+                f.write(''.join(lines[start:start + self.CHUNK_SIZE]))
+            f.flush()
+            if self.sync:
+                os.fsync(f.fileno())
+
+    def flush(self):
+        """Барьер сохранности: все принятые заказы уже записаны в файл"""
+
+    def _close_file(self):
+        """Закрывает файл журнала (вызывается под блокировкой)"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """Закрывает файл журнала"""
+        with self._lock:
+            self._close_file()
+
+    def recover(self):
+        """Отрезает недописанную последнюю строку после сбоя.
+
+        Файл читается с конца блоками до последнего перевода строки, поэтому
+        стоимость восстановления не зависит от количества заказов.
+        """
+        if not os.path.exists(self.filename):
+            return
+
+        with open(self.filename, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b'\n':
+                return
+
+            position = end
+            while position > 0:
+                start = max(position - self.BLOCK_SIZE, 0)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b'\n')
+                if newline != -1:
+                    f.truncate(start + newline + 1)
+                    return
+                position = start
+            f.truncate(0)
+
+    def last_order_id(self):
+        """Номер последнего записанного заказа (0, если журнал пуст).
+
+        Файл читается с конца блоками до первой целой строки, поэтому
+        стоимость не зависит от количества заказов. OrderManager выдает номер
+        и дописывает заказ в журнал под одной блокировкой, а compact
+        упорядочивает записи по номеру, поэтому последняя строка хранит
+        максимальный номер.
+        """
+        if not os.path.exists(self.filename):
+            return 0
+
+        with open(self.filename, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            tail = b''
+            while position > 0:
+                start = max(position - self.BLOCK_SIZE, 0)
+                f.seek(start)
+                tail = f.read(position - start) + tail
+                position = start
+                lines = tail.split(b'\n')
+                # первая строка блока может быть неполной, пока файл не дочитан до начала
+                complete = lines if position == 0 else lines[1:]
+                for line in reversed(complete):
+                    try:
+                        return int(json.loads(line)['order_id'])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                tail = lines[0]
+        return 0
+
+    def max_order_id(self, legacy_filename: str = None):
+        """Наибольший сохраненный номер заказа: хвост журнала и, если указан,
+        старый файл заказов, еще не перенесенный в журнал (или перенесенный)"""
+
+        last_id = self.last_order_id()
+        if legacy_filename and os.path.exists(legacy_filename):
+            with open(legacy_filename, 'r', encoding='utf-8') as f:
+                for order in json.load(f):
+                    last_id = max(last_id, int(order.get('order_id', 0)))
+        return last_id
+
+    def read(self):
+        """Возвращает все заказы из журнала, поврежденные строки пропускаются"""
+        if not os.path.exists(self.filename):
+            return []
+
+        orders = []
+        with open(self.filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    orders.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return orders
+
+    def compact(self, legacy_filename: str = None):
+        """Переписывает журнал без поврежденных строк.
+
+        Если указан legacy_filename (старый order.json со списком заказов),
+        его заказы переносятся в журнал. Раньше нумерация начиналась с 1 при
+        каждом запуске, поэтому order_id не уникален: заказ определяется парой
+        (order_id, order_date), и убираются только точные повторы этой пары
+        (например, при повторном переносе того же order.json). Новый файл
+        записывается рядом и атомарно подменяет старый. Возвращает количество заказов.
+
+        Чтение и подмена файла выполняются под блокировкой записи: заказ,
+        дописанный во время сжатия, ждет ее и попадает уже в новый файл.
+        """
+        with self._lock:
+            records = []
+            if legacy_filename and os.path.exists(legacy_filename):
+                with open(legacy_filename, 'r', encoding='utf-8') as f:
+                    records.extend(json.load(f))
+            records.extend(self.read())
+
+            orders = {}
+            for order in records:
+                orders.setdefault((order.get('order_id'), order.get('order_date')), order)
+            # по возрастанию номера (сортировка устойчива): последняя строка
+            # хранит максимальный номер, от которого продолжается нумерация
+            orders = sorted(orders.values(), key=lambda order: order.get('order_id', 0))
+
+            data = ''.join(json.dumps(order, ensure_ascii=False) + '\n' for order in orders)
+            self._close_file()
+            atomic_write(self.filename, data)
+        return len(orders)
+
+
+class GroupCommitJournal(OrderJournal):
+    """Журнал с групповой записью заказов.
+
+    append только ставит заказ в очередь в памяти, а фоновый поток пишет
+    накопленные заказы одной операцией - как только их набирается batch_size
+    или прошло flush_interval секунд. flush() ждет записи всех заказов,
+    поставленных до его вызова.
+    """
+
+    def __init__(self, filename: str = 'orders.jsonl', sync: bool = False,
+                 batch_size: int = 100, flush_interval: float = 0.05):
+        super().__init__(filename, sync)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[str] = []
+        self._condition = threading.Condition()
+        self._submitted = 0  # сколько заказов поставлено в очередь
+        self._written = 0  # сколько заказов записано
+        self._waiting = 0  # сколько вызовов flush ждут записи
+        self._error = None
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def append_lines(self, lines: List[str]):
+        """Ставит сериализованные заказы в очередь на запись"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Журнал заказов закрыт')
+            self._pending.extend(lines)
+            self._submitted += len(lines)
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify_all()
+
+    def _ready(self):
+        """Пора ли писать очередную пачку"""
+        return self._closed or self._waiting > 0 or len(self._pending) >= self.batch_size
+
+    def _write_loop(self):
+        """Фоновая запись накопленных заказов пачками"""
+        while True:
+            with self._condition:
+                self._condition.wait_for(self._ready, timeout=self.flush_interval)
+                batch, self._pending = self._pending, []
+                closed = self._closed
+
+            if batch:
+                try:
+                    super().append_lines(batch)
+                except Exception as error:
+                    # любая ошибка записи передается в flush(); поток продолжает
+                    # работу, иначе flush() ждал бы записи вечно
+                    self._error = error
+
+            with self._condition:
+                self._written += len(batch)
+                self._condition.notify_all()
+                if closed and not self._pending:
+                    return
+
+    def flush(self):
+        """Барьер сохранности: ждет записи всех ранее поставленных заказов"""
+        with self._condition:
+            target = self._submitted
+            self._waiting += 1
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: self._written >= target)
+            self._waiting -= 1
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        """Дописывает очередь, останавливает фоновый поток и закрывает файл"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._writer.join()
+        super().close()
+
+    def compact(self, legacy_filename: str = None):
+        """Сжимает журнал, предварительно дописав очередь.
+
+        Фоновый поток пишет через append_lines под той же блокировкой, что
+        и сжатие, поэтому пачка, взятая им после flush(), ждет подмены файла
+        и дописывается уже в новый журнал.
+        """
+        self.flush()
+        return super().compact(legacy_filename)
+
 
 class Order:
     """Класс, представляющий заказ на пиццу"""
 
-    _next_id = 1
-    def __init__(self, pizza: Pizza, price_strategy: PriceStrategy = None):
-        self.order_id = Order._next_id
-        Order._next_id += 1
+    # next() у itertools.count атомарен, поэтому номера не повторяются
+    # при создании заказов из нескольких потоков; OrderManager выдает номер
+    # и пишет заказ в журнал под _ids_lock, чтобы номера в журнале шли по порядку
+    _ids = itertools.count(1)
+    _ids_lock = threading.Lock()
+
+    def __init__(self, pizza: Pizza, price_strategy: PriceStrategy = None,
+                 order_date: datetime.datetime = None, totals: tuple = None):
+        self.order_id = next(Order._ids)
         self.pizza = pizza
-        self.price_strategy = price_strategy or StandardPriceStrategy()
-        self.order_date = datetime.datetime.now()
-        self._observers: List[OrderObserver] = []
+        self.price_strategy = price_strategy or STANDARD_PRICE
+        self.order_date = order_date or datetime.datetime.now()
+        self._observers: Optional[List[OrderObserver]] = None  # создается при первой подписке
+        # стоимость фиксируется при создании заказа: последующие изменения
+        # цен начинок не меняют сумму уже оформленного заказа; totals - заранее
+        # посчитанные (цена до стратегии, цена, себестоимость) при пакетном создании
+        if totals is None:
+            list_price = pizza.get_list_price()
+            totals = (list_price, self.price_strategy.calculate_price(list_price), pizza.get_total_cost())
+        self.list_price, self.total_price, self.total_cost = totals
 
-    @property
-    def total_price(self):
-        """Расчет общей стоимости заказа"""
-        return self.pizza.get_total_price(self.price_strategy)
+    @classmethod
+    def resume_ids(cls, last_id: int):
+        """Продолжает нумерацию после last_id (сохраненного максимума).
 
-    @property
-    def total_cost(self):
-        """Расчет общей себестоимости заказа"""
-        return self.pizza.get_total_cost()
+        Нумерация не откатывается назад, если номера больше last_id уже выданы.
+        Вызывается при запуске, до создания заказов из других потоков.
+        """
+        with cls._ids_lock:
+            current = next(cls._ids)
+            cls._ids = itertools.count(max(current, last_id + 1))
 
     @property
     def profit(self):
@@ -209,17 +1166,18 @@ class Order:
 
     def add_observer(self, observer: OrderObserver):
         """Добавление наблюдения к заказу"""
+        if self._observers is None:
+            self._observers = []
         self._observers.append(observer)
 
     def notify_observer(self):
         """Уведомляет о создании заказа"""
-        for observer in self._observers:
+        for observer in self._observers or ():
             observer.update(self)
 
-    def save_to_file(self, filename: str = 'order.json'):
-        """Сохранение информации о заказе в JSON файл"""
-
-        order_data = {
+    def to_record(self):
+        """Данные заказа для сохранения в журнал"""
+        return {
             'order_id': self.order_id,
             'pizza_name': self.pizza.name,
             'total_price': self.total_price,
@@ -229,48 +1187,240 @@ class Order:
             'toppings': [t.name for t in self.pizza.all_toppings]
         }
 
-        orders = []
-        if os.path.exists(filename):
-            with open(filename, 'r', encoding='utf-8') as f:
-                orders = json.load(f)
+    def save_to_file(self, filename: str = 'orders.jsonl'):
+        """Дописывание заказа в журнал заказов (JSON Lines)"""
+        journal = OrderJournal(filename)
+        journal.append(self.to_record())
+        journal.close()
+
+class RollingBuckets:
+    """Кольцевой буфер итогов продаж по интервалам фиксированной длины.
+
+    Хранит только последние size интервалов: слот с устаревшим номером
+    интервала обнуляется при следующей записи в него, поэтому память не растет
+    со временем, а запрос за n интервалов стоит O(n).
+    """
+
+    def __init__(self, bucket_seconds: int, size: int):
+        self.bucket_seconds = bucket_seconds
+        self.size = size
+        self._buckets = array('q', [-1]) * size  # номер интервала в слоте
+        self._orders = array('q', [0]) * size
+        self._revenue = array('d', [0.0]) * size
+        self._cost = array('d', [0.0]) * size
+
+    def _bucket(self, moment: datetime.datetime):
+        return int(moment.timestamp()) // self.bucket_seconds
+
+    def add(self, moment: datetime.datetime, revenue: float, cost: float, orders: int = 1):
+        bucket = self._bucket(moment)
+        i = bucket % self.size
+        if self._buckets[i] != bucket:
+            if self._buckets[i] > bucket:
+                return  # интервал уже вытеснен из буфера
+            self._buckets[i] = bucket
+            self._orders[i] = 0
+            self._revenue[i] = 0.0
+            self._cost[i] = 0.0
+        self._orders[i] += orders
+        self._revenue[i] += revenue
+        self._cost[i] += cost
+
+    def series(self, count: int, now: datetime.datetime = None):
+        """Итоги за последние count интервалов, от старых к новым"""
+
+        count = min(count, self.size)
+        last = self._bucket(now or datetime.datetime.now())
+        result = []
+        for bucket in range(last - count + 1, last + 1):
+            i = bucket % self.size
+            if self._buckets[i] == bucket:
+                result.append((self._orders[i], self._revenue[i], self._cost[i]))
+            else:
+                result.append((0, 0.0, 0.0))
+        return result
+
+    def total(self, count: int, now: datetime.datetime = None):
+        """Сумма итогов за последние count интервалов"""
+
+        orders, revenue, cost = 0, 0.0, 0.0
+        for bucket_orders, bucket_revenue, bucket_cost in self.series(count, now):
+            orders += bucket_orders
+            revenue += bucket_revenue
+            cost += bucket_cost
+        return {'orders': orders, 'revenue': revenue, 'cost': cost, 'profit': revenue - cost}
 
-        orders.append(order_data)
+class SalesWindowTracker(OrderObserver):
+    """Статистика продаж за скользящие окна времени: поминутно за сутки
+    и почасово за неделю"""
+
+    def __init__(self, minutes: int = 24 * 60, hours: int = 7 * 24):
+        self.minutes = RollingBuckets(60, minutes)
+        self.hours = RollingBuckets(60 * 60, hours)
+
+    def update(self, order: 'Order'):
+        self.minutes.add(order.order_date, order.total_price, order.total_cost)
+        self.hours.add(order.order_date, order.total_price, order.total_cost)
+
+    def update_batch(self, orders: List['Order']):
+        """Заказы пачки с одинаковым временем добавляются в буферы одной записью"""
+
+        groups = {}
+        for order in orders:
+            group = groups.get(order.order_date)
+            if group is None:
+                groups[order.order_date] = [1, order.total_price, order.total_cost]
+            else:
+                group[0] += 1
+                group[1] += order.total_price
+                group[2] += order.total_cost
+
+        for order_date, (count, revenue, cost) in groups.items():
+            self.minutes.add(order_date, revenue, cost, count)
+            self.hours.add(order_date, revenue, cost, count)
+
+    def get_last_minutes(self, minutes: int, now: datetime.datetime = None):
+        """Итоги за последние minutes минут"""
+        return self.minutes.total(minutes, now)
+
+    def get_last_hours(self, hours: int, now: datetime.datetime = None):
+        """Итоги за последние hours часов"""
+        return self.hours.total(hours, now)
+
+    def get_orders_per_hour_today(self, now: datetime.datetime = None):
+        """Количество заказов по часам с начала текущих суток"""
+
+        now = now or datetime.datetime.now()
+        return [orders for orders, _, _ in self.hours.series(now.hour + 1, now)]
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(orders, f, ensure_ascii=False, indent=2)
 
 class OrderManager:
     """Управление заказами"""
 
-    def __init__(self):
+    def __init__(self, journal: OrderJournal = None, bus: ObserverBus = None):
         self.orders: List[Order] = []
+        # колонки для пересчета истории заказов (reprice_history)
+        self._list_prices = array('d')
+        self._costs = array('d')
         self.statistics = StatisticsTracker()
+        self.sales_window = SalesWindowTracker()
+        self.logger = OrderLogger()
+        self.journal = journal or OrderJournal()
+        # нумерация продолжается с последнего сохраненного заказа
+        Order.resume_ids(self.journal.max_order_id(OrderJournal.LEGACY_FILENAME))
+        self.bus = bus or ObserverBus()
+        self._closed = False
+        for observer in (self.statistics, self.sales_window, self.logger):
+            self.bus.subscribe(observer)
+
+    def _check_open(self):
+        """Заказ после close() отклоняется до выдачи номера и записи в журнал"""
+        if self._closed:
+            raise RuntimeError('Менеджер заказов закрыт')
 
     def create_order(self, pizza: Pizza, price_strategy: PriceStrategy = None):
         """Создание и регистрация заказа в системе"""
 
-        order = Order(pizza, price_strategy)
-        order.add_observer(self.statistics)
-        order.add_observer(OrderLogger())
-        order.notify_observer()
-        order.save_to_file()
-        self.orders.append(order)
+        self._check_open()
+        totals = PizzaFactory.quote(pizza, price_strategy)
+        # номер выдается и заказ ставится в журнал под одной блокировкой:
+        # иначе параллельные заказы попадут в журнал не по порядку номеров
+        # и last_order_id после перезапуска вернет не максимум
+        with Order._ids_lock:
+            order = Order(pizza, price_strategy, totals=totals)
+            self.journal.append(order.to_record())
+            self.orders.append(order)
+            self._list_prices.append(order.list_price)
+            self._costs.append(order.total_cost)
+        self.bus.publish(order)
         return order
 
-    def get_total_statistics(self):
-        """Общая статистика по всем заказам"""
-
-        total_revenue = sum(o.total_price for o in self.orders)
-        total_cost = sum(o.total_cost for o in self.orders)
-        total_profit = total_revenue - total_cost
-
+    def create_orders(self, items):
+        """Пакетное создание заказов из пар (пицца, стратегия цены).
+
+        Все заказы пачки получают одно время создания, наблюдатели получают
+        одно событие update_batch, а журнал - одну запись append_many.
+        Возвращает список созданных заказов.
+        """
+
+        self._check_open()
+        order_date = datetime.datetime.now()
+        items = [(pizza, price_strategy or STANDARD_PRICE) for pizza, price_strategy in items]
+        if not items:
+            return []
+
+        # цена считается один раз на пару (пицца, стратегия):
+        # каждой стратегии передается сразу вся пачка ее цен до скидок
+        by_strategy = {}
+        for pizza, price_strategy in items:
+            by_strategy.setdefault(price_strategy, {}).setdefault(pizza, None)
+        quotes = {}
+        for price_strategy, pizzas in by_strategy.items():
+            list_prices = [pizza.get_list_price() for pizza in pizzas]
+            prices = price_strategy.calculate_prices(list_prices)
+            for pizza, list_price, price in zip(pizzas, list_prices, prices):
+                quotes[pizza, price_strategy] = (list_price, price, pizza.get_total_cost())
+        # номера пачки выдаются и пачка ставится в журнал под одной блокировкой
+        # (см. create_order)
+        with Order._ids_lock:
+            orders = [Order(pizza, price_strategy, order_date, quotes[pizza, price_strategy])
+                      for pizza, price_strategy in items]
+
+            # записи пачки отличаются только номером заказа: каждая пара
+            # (пицца, стратегия) сериализуется один раз, номер подставляется в строку
+            prefix = '{"order_id": '
+            templates = {}
+            lines = []
+            for order in orders:
+                suffix = templates.get((order.pizza, order.price_strategy))
+                if suffix is None:
+                    encoded = OrderJournal._encode(order.to_record())
+                    suffix = encoded[len(prefix) + len(str(order.order_id)):] + '\n'
+                    templates[order.pizza, order.price_strategy] = suffix
+                lines.append(prefix + str(order.order_id) + suffix)
+
+            self.journal.append_lines(lines)
+            self.orders.extend(orders)
+            self._list_prices.extend(order.list_price for order in orders)
+            self._costs.extend(order.total_cost for order in orders)
+        self.bus.publish_batch(orders)
+        return orders
+
+    def reprice_history(self, strategy: PriceStrategy):
+        """Итоги всех заказов, если бы они были проданы по стратегии strategy.
+
+        Заказы не изменяются: цены до скидок хранятся колонкой и пересчитываются
+        одним вызовом calculate_prices.
+        """
+
+        total_revenue = math.fsum(strategy.calculate_prices(self._list_prices))
+        total_cost = math.fsum(self._costs)
         return {
-            'total_orders': len(self.orders),
+            'total_orders': len(self._list_prices),
             'total_revenue': total_revenue,
             'total_cost': total_cost,
-            'total_profit': total_profit
+            'total_profit': total_revenue - total_cost
         }
 
+    def flush(self):
+        """Ждет сохранения и обработки наблюдателями всех созданных заказов"""
+        self.journal.flush()
+        self.bus.flush()
+
+    def close(self):
+        """Останавливает доставку событий и закрывает журнал заказов"""
+        self._closed = True
+        self.bus.close()
+        self.journal.close()
+
+    def get_total_statistics(self):
+        """Общая статистика по всем заказам"""
+
+        # наблюдатели обновляются асинхронно: дожидаемся уже созданных заказов
+        self.bus.flush(self.statistics)
+        self.bus.flush(self.sales_window)
+        return self.statistics.get_statistics()
+
 
 class UserInterface:
     """Основной пользовательский интерфейс приложения"""
@@ -279,7 +1429,7 @@ class UserInterface:
         """Инициализирует пользовательский интерфейс"""
 
         self.order_manager = OrderManager()
-        self.available_toppings = [
+        toppings = [
             Topping("Сыр", 50, 20),
             Topping("Ветчина", 70, 30),
             Topping("Грибы", 40, 15),
@@ -289,6 +1439,8 @@ class UserInterface:
             Topping("Лук", 20, 5),
             Topping("Перец", 30, 12)
         ]
+        # Общие экземпляры из реестра фабрики: цены могли быть изменены и сохранены ранее
+        self.available_toppings = [PizzaFactory.register_topping(t) for t in toppings]
 
         self._load_standard_recipes()
 
@@ -333,7 +1485,7 @@ class UserInterface:
         ]
 
         for recipe in standard_recipes:
-            PizzaFactory._recipes[recipe.name] = recipe
+            PizzaFactory.add_recipe(recipe)
 
     def show_main_menu(self):
         """Отображает главное меню приложения и обрабатывает выбор пользователя"""
@@ -398,7 +1550,7 @@ class UserInterface:
         if price_choice == "2":
             strategy = DiscountPriceStrategy(10)
         else:
-            strategy = StandardPriceStrategy()
+            strategy = STANDARD_PRICE
 
         order = self.order_manager.create_order(pizza, strategy)
 
@@ -456,7 +1608,7 @@ class UserInterface:
             if choice == 0:
                 break
             elif 1 <= choice <= len(self.available_toppings):
-                pizza.custom_toppings.append(self.available_toppings[choice - 1])
+                pizza.add_topping(self.available_toppings[choice - 1])
                 print(f"Добавлен: {self.available_toppings[choice - 1].name}")
             else:
                 print("Неверный выбор!")
@@ -469,6 +1621,17 @@ class UserInterface:
         print(f"Общая выручка: {stats['total_revenue']:.2f} руб.")
         print(f"Общая себестоимость: {stats['total_cost']:.2f} руб.")
         print(f"Общая прибыль: {stats['total_profit']:.2f} руб.")
+        recent = self.order_manager.sales_window.get_last_minutes(15)
+        print(f"За последние 15 минут: {recent['orders']} заказов, выручка {recent['revenue']:.2f} руб.")
+        per_hour = self.order_manager.sales_window.get_orders_per_hour_today()
+        hourly = ", ".join(f"{hour:02d}ч - {orders}" for hour, orders in enumerate(per_hour) if orders)
+        print(f"Заказы по часам сегодня: {hourly or 'нет'}")
+        for title, key in (("По пиццам", 'by_pizza'), ("По стратегиям цены", 'by_strategy')):
+            if stats[key]:
+                print(f"\n{title}:")
+            for name, group in stats[key].items():
+                print(f"  {name}: {group['orders']} шт., выручка {group['revenue']:.2f} руб., "
+                      f"прибыль {group['profit']:.2f} руб.")
 
     def admin_panel(self):
         """Панель администратора для управления рецептами"""
@@ -487,7 +1650,9 @@ class UserInterface:
             print("3. Удалить рецепт")
             print("4. Сохранить рецепты в файл")
             print("5. Загрузить рецепты из файла")
-            print("6. Назад")
+            print("6. Изменить цену начинки")
+            print("7. Сжать журнал заказов")
+            print("8. Назад")
 
             choice = input("Выберите действие: ")
 
@@ -498,12 +1663,19 @@ class UserInterface:
             elif choice == "3":
                 self.delete_recipe_admin()
             elif choice == "4":
-                PizzaFactory.save_recipes()
-                print("Рецепты сохранены!")
+                if PizzaFactory.save_recipes():
+                    print("Рецепты сохранены!")
+                else:
+                    print("Изменений нет, файл не перезаписан")
             elif choice == "5":
                 PizzaFactory.load_recipes()
                 print("Рецепты загружены!")
             elif choice == "6":
+                self.update_topping_admin()
+            elif choice == "7":
+                count = self.order_manager.journal.compact(legacy_filename=OrderJournal.LEGACY_FILENAME)
+                print(f"Журнал сжат, заказов: {count}")
+            elif choice == "8":
                 break
             else:
                 print("Неверный выбор!")
@@ -521,6 +1693,28 @@ class UserInterface:
             if recipe.toppings:
                 print(f"  Начинки: {', '.join(t.name for t in recipe.toppings)}")
 
+    def update_topping_admin(self):
+        """Изменяет цену и себестоимость начинки через админ-панель"""
+
+        print("\nИзменение цены начинки")
+        for i, topping in enumerate(self.available_toppings, 1):
+            print(f"{i}. {topping.name} - {topping.price} руб. (себестоимость {topping.cost} руб.)")
+
+        try:
+            choice = int(input("Выберите начинку: ")) - 1
+            price = float(input("Новая цена: "))
+            cost = float(input("Новая себестоимость: "))
+        except ValueError:
+            print("Неверный ввод!")
+            return
+
+        if 0 <= choice < len(self.available_toppings):
+            name = self.available_toppings[choice].name
+            PizzaFactory.update_topping(name, price, cost)
+            print(f"Цена начинки '{name}' изменена!")
+        else:
+            print("Неверный выбор!")
+
     def add_recipe_admin(self):
         """Добавляет новый рецепт через админ-панель"""
 
@@ -579,6 +1773,7 @@ if __name__ == '__main__':
 
     ui = UserInterface()
     ui.show_main_menu()
+    ui.order_manager.close()
 
     PizzaFactory.save_recipes()
 
@@ -2,6 +2,8 @@
 class Article:
     """Класс Статья, представляющий модель данных"""
 
+    __slots__ = ('title', 'author', 'char_count', 'publication', 'description')
+
     def __init__(self, title: str, author: str, char_count: int,
                  publication: str, description: str = ""):
 
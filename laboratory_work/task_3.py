@@ -2,6 +2,8 @@
 class Film:
     """Класс Фильм, представляющий модель данных"""
 
+    __slots__ = ('title', 'genre', 'director', 'year', 'duration', 'studio', 'actors')
+
     def __init__(self, title: str, genre: str, director: str,
                  year: int, duration: int, studio: str, actors: list = None):
 